@@ -5,16 +5,224 @@ Intelligent file operations with learning and auto-organization
 
 import shutil
 import os
-import zipfile
-import glob
+import subprocess
+import sys
+import errno
+import filecmp
+import concurrent.futures
+import stat
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Any
 import asyncio
 from loguru import logger
 import fnmatch
-import tempfile
-from datetime import datetime
-import json
+import hashlib
+from collections import defaultdict, deque
+import functools
+import re
+from itertools import count, islice
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+# Bytes compared at the start and end of a file before hashing it in full
+QUICK_SIGNATURE_BYTES = 4096
+HASH_CHUNK_SIZE = 1 << 20
+
+# Duplicate groups with at least this many bytes to hash use the process pool
+PROCESS_HASH_MIN_BYTES = 64 * 1024 * 1024
+
+# Larger chunks for byte-wise compares (default is 8 KB)
+filecmp.BUFSIZE = 64 * 1024
+
+# Files below this size aren't worth spawning `cp -c` for an APFS clone
+CLONE_MIN_BYTES = 1 << 20
+
+# Maximum number of file operations handed to the thread pool at once
+FILE_OP_BATCH_SIZE = 64
+
+# Spoken shortcuts for common file sets, matched against file names in Downloads
+PATTERN_SHORTCUTS = {
+    "alle bilder": re.compile(r'.*\.(jpg|jpeg|png|gif|bmp)$', re.IGNORECASE),
+    "alle pdfs": re.compile(r'.*\.pdf$', re.IGNORECASE),
+    "alle videos": re.compile(r'.*\.(mp4|avi|mov|mkv)$', re.IGNORECASE),
+}
+
+
+@dataclass(slots=True)
+class _FileInfo:
+    """A matched path together with the one stat result taken for it"""
+    path: Path
+    name: str
+    suffix: str
+    stem: str
+    size: int
+    is_dir: bool
+    is_file: bool
+    device: int
+    
+    @classmethod
+    def from_stat(cls, path: Path, st: os.stat_result) -> "_FileInfo":
+        return cls(
+            path=path,
+            name=path.name,
+            suffix=path.suffix,
+            stem=path.stem,
+            size=st.st_size,
+            is_dir=stat.S_ISDIR(st.st_mode),
+            is_file=stat.S_ISREG(st.st_mode),
+            device=st.st_dev
+        )
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str):
+    """Compile a glob into a reusable regex match function"""
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+@functools.lru_cache(maxsize=256)
+def _brace_regex(name: str):
+    """Compile a glob with one brace group (e.g. '*.{jpg,png}') into a single regex"""
+    prefix, _, rest = name.partition('{')
+    alternatives, _, suffix = rest.partition('}')
+    globs = [prefix + alt.strip() + suffix for alt in alternatives.split(',')]
+    return re.compile('|'.join(fnmatch.translate(g) for g in globs), re.IGNORECASE)
+
+
+def _quick_signature(path: Path) -> tuple:
+    """Cheap content signature: size plus the first and last few KB"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(QUICK_SIGNATURE_BYTES)
+        if size > 2 * QUICK_SIGNATURE_BYTES:
+            f.seek(-QUICK_SIGNATURE_BYTES, os.SEEK_END)
+            tail = f.read(QUICK_SIGNATURE_BYTES)
+        else:
+            tail = b""
+    return size, head, tail
+
+
+def _full_hash(path):
+    """Hash the whole file (xxh3 if available, BLAKE2 otherwise)"""
+    hasher = xxhash.xxh3_64() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)
+    buf = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        # Read into one reused buffer instead of allocating a bytes object per chunk
+        while n := f.readinto(buf):
+            hasher.update(view[:n])
+    return hasher.intdigest() if XXHASH_AVAILABLE else hasher.digest()
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_resolved_cached(home_prefix: str, restricted_prefixes: tuple, resolved_str: str):
+    """Return None if a resolved path is allowed, otherwise the reason it is not (memoized)"""
+    # Only the pure string decision is cached; resolving symlinks must happen on every call
+    # Prefixes end with os.sep, so this matches the root itself and anything below it
+    candidate = resolved_str + os.sep
+    for restricted in restricted_prefixes:
+        if candidate.startswith(restricted):
+            return f"Path {resolved_str} is in restricted area {restricted.rstrip(os.sep)}"
+            
+    # Must be under home directory for safety
+    if candidate.startswith(home_prefix):
+        return None
+    return f"Path {resolved_str} is outside home directory"
+
+
+def _batched(iterable, size: int = FILE_OP_BATCH_SIZE):
+    """Yield lists of up to `size` items"""
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _fast_copy(src, dst, preserve_metadata: bool = True):
+    """Copy file content via the cheapest mechanism the platform offers"""
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    src_stat = os.stat(src)
+    
+    # On macOS, same-volume copies can be APFS clones (copy-on-write, no data copied)
+    if (sys.platform == "darwin" and src_stat.st_size >= CLONE_MIN_BYTES
+            and src_stat.st_dev == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev):
+        args = ["cp", "-c"] + (["-p"] if preserve_metadata else []) + [os.fspath(src), os.fspath(dst)]
+        if subprocess.run(args, capture_output=True).returncode == 0:
+            return dst
+            
+    # copyfile uses sendfile (Linux) / fcopyfile (macOS) under the hood
+    shutil.copyfile(src, dst)
+    if preserve_metadata:
+        shutil.copystat(src, dst)
+    return dst
+
+
+def _copy_one(src: Path, dst: Path, preserve_metadata: bool = True) -> tuple:
+    """Copy a file or directory, returning (src, dst, error or None)"""
+    try:
+        if src.is_dir():
+            copy_function = functools.partial(_fast_copy, preserve_metadata=preserve_metadata)
+            shutil.copytree(src, dst, copy_function=copy_function, dirs_exist_ok=True)
+        else:
+            _fast_copy(src, dst, preserve_metadata)
+        return src, dst, None
+    except Exception as e:
+        return src, dst, e
+
+
+def _move_one(src: Path, dst: Path) -> tuple:
+    """Move a file or directory, returning (src, dst, error or None)"""
+    try:
+        shutil.move(src, dst)
+        return src, dst, None
+    except Exception as e:
+        return src, dst, e
+
+
+def _delete_one(path: Path) -> tuple:
+    """Delete a file or directory tree, returning (path, error or None)"""
+    try:
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        return path, None
+    except Exception as e:
+        return path, e
+
+
+def _rename_or_move(src: Path, dst: Path, same_device: bool):
+    """Move with a single rename() when possible, falling back to shutil.move"""
+    if same_device:
+        try:
+            os.rename(src, dst)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    shutil.move(src, dst)
+
+
+def _iter_scandir(root):
+    """Walk a directory tree iteratively, yielding (entry, parent) pairs"""
+    stack = deque([os.fspath(root)])
+    while stack:
+        parent = stack.pop()
+        try:
+            with os.scandir(parent) as it:
+                for entry in it:
+                    yield entry, parent
+                    # Don't descend into symlinked directories to avoid cycles
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable directory {parent}: {e}")
 
 
 class EnhancedActionExecutor:
@@ -22,10 +230,15 @@ class EnhancedActionExecutor:
         """Initialize enhanced action executor with intelligent features"""
         self.allowed_operations = allowed_ops
         self.restricted_paths = [Path(p).expanduser().resolve() for p in restricted_paths]
+        self._restricted_prefixes = tuple(os.fspath(p) + os.sep for p in self.restricted_paths)
         self.config = config or {}
+        # Copy timestamps/permissions along with file content
+        self.preserve_metadata = self.config.get('preserve_metadata', True)
         
         # Common paths
         self.home_path = Path.home()
+        self._home_str = str(self.home_path)
+        self._home_prefix = self._home_str + os.sep
         self.personal_spaces = self.config.get('personal_spaces', {})
         
         # Setup personal workspace paths
@@ -35,9 +248,31 @@ class EnhancedActionExecutor:
         self.coding_path = Path(self.personal_spaces.get('coding', self.home_path / "Code"))
         self.marsap_path = Path(self.personal_spaces.get('marsap', self.home_path / "MARSAP"))
         
+        # Intelligent folder mappings, keyed by the first path segment
+        self._folder_mappings = {
+            "downloads": self.downloads_path,
+            "documents": self.documents_path,
+            "projekte": self.projects_path,
+            "projects": self.projects_path,
+            "code": self.coding_path,
+            "coding": self.coding_path,
+            "marsap": self.marsap_path,
+            "desktop": self.home_path / "Desktop",
+            "bilder": self.home_path / "Pictures",
+            "pictures": self.home_path / "Pictures",
+            "musik": self.home_path / "Music",
+            "music": self.home_path / "Music"
+        }
+        
         # Create workspace directories if they don't exist
         self._ensure_workspace_directories()
         
+        # Process pool for hashing large duplicate candidates (created on first use)
+        self._hash_pool = None
+        
+        # Name-conflict suffix counters per destination folder
+        self._conflict_counters = defaultdict(lambda: count(1))
+        
         # File organization rules
         self.organization_rules = {
             'images': {
@@ -70,6 +305,14 @@ class EnhancedActionExecutor:
             }
         }
         
+        # Extension -> (category, destination) index for O(1) categorization
+        self._ext_to_category = {
+            ext.lower(): (name, info['destination'])
+            for name, info in self.organization_rules.items()
+            for ext in info['extensions']
+        }
+        self._misc_category = ('misc', self.downloads_path / "Misc")
+        
         logger.info(f"Enhanced Action Executor initialized with {len(allowed_ops)} operations")
         logger.info(f"Personal workspaces: {list(self.personal_spaces.keys())}")
         
@@ -83,48 +326,28 @@ class EnhancedActionExecutor:
             self.marsap_path
         ]
         
+        # These nearly always exist already, so stat first and only mkdir what's missing
         for dir_path in workspace_dirs:
+            if dir_path.is_dir():
+                continue
             try:
                 dir_path.mkdir(parents=True, exist_ok=True)
-                logger.debug(f"Ensured directory exists: {dir_path}")
+                logger.debug(f"Created directory: {dir_path}")
             except Exception as e:
                 logger.warning(f"Could not create directory {dir_path}: {e}")
                 
+        logger.debug(f"Workspace ready: {[str(p) for p in workspace_dirs if p.is_dir()]}")
+                
     def _resolve_path(self, path_str: str) -> Path:
         """Resolve path string with intelligent workspace mapping"""
         try:
-            # Handle common shortcuts
-            path_str = path_str.replace("~", str(self.home_path))
-            
-            # Intelligent folder mappings
-            folder_mappings = {
-                "downloads": self.downloads_path,
-                "documents": self.documents_path,
-                "projekte": self.projects_path,
-                "projects": self.projects_path,
-                "code": self.coding_path,
-                "coding": self.coding_path,
-                "marsap": self.marsap_path,
-                "desktop": self.home_path / "Desktop",
-                "bilder": self.home_path / "Pictures",
-                "pictures": self.home_path / "Pictures",
-                "musik": self.home_path / "Music",
-                "music": self.home_path / "Music"
-            }
-            
-            path_lower = path_str.lower().strip()
-            for key, mapped_path in folder_mappings.items():
-                if key in path_lower:
-                    # If it's just the folder name, return the folder
-                    if path_lower == key:
-                        return mapped_path
-                    # If it's a path containing the folder, substitute it
-                    return mapped_path / path_str.split('/')[-1] if '/' in path_str else mapped_path
-                    
-            # Convert to Path and resolve
-            path = Path(path_str).expanduser().resolve()
-            return path
-            
+            # "downloads", "Bilder/urlaub.jpg", ... map onto the personal workspaces
+            head, _, rest = path_str.strip().partition("/")
+            mapped_path = self._folder_mappings.get(head.lower())
+            if mapped_path:
+                return mapped_path / rest if rest else mapped_path
+                
+            return Path(path_str.replace("~", self._home_str)).expanduser().resolve()
         except Exception as e:
             logger.error(f"Path resolution failed for '{path_str}': {e}")
             raise ValueError(f"Invalid path: {path_str}")
@@ -132,131 +355,137 @@ class EnhancedActionExecutor:
     def _validate_path(self, path: Path) -> bool:
         """Enhanced path validation with workspace awareness"""
         try:
-            path = path.resolve()
-            
-            # Check if path is in restricted areas
-            for restricted in self.restricted_paths:
-                try:
-                    path.relative_to(restricted)
-                    logger.error(f"Path {path} is in restricted area {restricted}")
-                    return False
-                except ValueError:
-                    continue
-                    
-            # Must be under home directory for safety
-            try:
-                path.relative_to(self.home_path)
-                return True
-            except ValueError:
-                logger.error(f"Path {path} is outside home directory")
+            error = _validate_resolved_cached(
+                self._home_prefix, self._restricted_prefixes, os.path.realpath(path)
+            )
+            if error:
+                logger.error(error)
                 return False
-                
+            return True
+            
         except Exception as e:
             logger.error(f"Path validation failed: {e}")
             return False
             
     def _expand_glob_patterns(self, patterns: List[str]) -> List[Path]:
         """Enhanced glob expansion with intelligent search"""
-        expanded_paths = []
+        return [info.path for info in self._expand_file_infos(patterns)]
+        
+    def _expand_file_infos(self, patterns: List[str]) -> List[_FileInfo]:
+        """Expand patterns like _expand_glob_patterns, stat-ing each match exactly once"""
+        expanded = []
+        
+        # Patterns sharing a parent directory are matched in a single scan of it
+        buckets = defaultdict(list)
         
         for pattern in patterns:
             try:
                 # Special handling for common patterns
-                if pattern.lower() == "alle bilder":
-                    pattern = "*.{jpg,jpeg,png,gif,bmp}"
-                elif pattern.lower() == "alle pdfs":
-                    pattern = "*.pdf"
-                elif pattern.lower() == "alle videos":
-                    pattern = "*.{mp4,avi,mov,mkv}"
+                shortcut = PATTERN_SHORTCUTS.get(pattern.lower())
+                if shortcut:
+                    buckets[self.downloads_path].append((shortcut.match, False))
+                    continue
                     
                 pattern_path = self._resolve_path(pattern)
                 
                 # If it's a direct path that exists, add it
-                if pattern_path.exists():
-                    expanded_paths.append(pattern_path)
+                try:
+                    expanded.append(_FileInfo.from_stat(pattern_path, pattern_path.stat()))
                     continue
+                except FileNotFoundError:
+                    pass
                     
-                # Try as glob pattern
-                if '*' in pattern or '?' in pattern or '{' in pattern:
-                    # Use parent directory for glob
-                    parent = pattern_path.parent
-                    if parent.exists():
-                        # Handle brace expansion manually
-                        if '{' in pattern_path.name:
-                            extensions = pattern_path.name.split('{')[1].split('}')[0].split(',')
-                            base_pattern = pattern_path.name.split('{')[0]
-                            for ext in extensions:
-                                matches = list(parent.glob(f"{base_pattern}*.{ext.strip()}"))
-                                expanded_paths.extend(matches)
-                        else:
-                            matches = list(parent.glob(pattern_path.name))
-                            expanded_paths.extend(matches)
-                        logger.info(f"Glob pattern '{pattern}' matched {len(expanded_paths)} files")
-                    else:
-                        logger.warning(f"Parent directory {parent} does not exist for pattern {pattern}")
-                else:
+                if not ('*' in pattern or '?' in pattern or '{' in pattern):
                     # Direct path that doesn't exist
                     logger.warning(f"Path does not exist: {pattern_path}")
+                    continue
                     
+                # Use parent directory for glob
+                name = pattern_path.name
+                if '{' in name:
+                    matcher = _brace_regex(name).match
+                else:
+                    matcher = _compile_glob(name)
+                # Like Path.glob, wildcards don't match hidden files unless asked for
+                buckets[pattern_path.parent].append((matcher, name.startswith('.')))
+                
             except Exception as e:
                 logger.error(f"Error expanding pattern '{pattern}': {e}")
                 
-        return expanded_paths
+        for parent, matchers in buckets.items():
+            if not parent.exists():
+                logger.warning(f"Parent directory {parent} does not exist for glob patterns")
+                continue
+                
+            try:
+                matched = 0
+                with os.scandir(parent) as it:
+                    for entry in it:
+                        hidden = entry.name.startswith('.')
+                        for matcher, include_hidden in matchers:
+                            if (include_hidden or not hidden) and matcher(entry.name):
+                                try:
+                                    expanded.append(_FileInfo.from_stat(Path(entry.path), entry.stat()))
+                                    matched += 1
+                                except OSError as e:
+                                    logger.warning(f"Could not stat {entry.path}: {e}")
+                                break
+                logger.info(f"{len(matchers)} glob pattern(s) in {parent} matched {matched} files")
+                
+            except Exception as e:
+                logger.error(f"Error scanning {parent}: {e}")
+                
+        return expanded
         
     async def _organize_by_type(self, sources: List[str]) -> Dict:
         """Intelligent file organization by type"""
         try:
-            source_paths = self._expand_glob_patterns(sources)
+            source_infos = self._expand_file_infos(sources)
             
-            if not source_paths:
+            if not source_infos:
                 return {"success": False, "error": "No source files found to organize"}
                 
             organized_files = {}
             errors = []
             
-            for source_path in source_paths:
+            # Create each destination folder once rather than per file
+            needed_folders = {
+                self._ext_to_category.get(info.suffix.lower(), self._misc_category)[1]
+                for info in source_infos
+            }
+            folder_devices = {}
+            for folder in needed_folders:
+                try:
+                    folder.mkdir(parents=True, exist_ok=True)
+                    folder_devices[folder] = folder.stat().st_dev
+                except Exception as e:
+                    logger.warning(f"Could not create directory {folder}: {e}")
+                    
+            for info in source_infos:
+                source_path = info.path
                 try:
                     if not self._validate_path(source_path):
                         errors.append(f"Invalid path: {source_path}")
                         continue
                         
-                    if not source_path.exists():
-                        errors.append(f"File does not exist: {source_path}")
-                        continue
-                        
                     # Determine file category
-                    file_ext = source_path.suffix.lower()
-                    category = None
-                    
-                    for cat_name, cat_info in self.organization_rules.items():
-                        if file_ext in cat_info['extensions']:
-                            category = cat_name
-                            break
-                            
-                    if not category:
-                        category = 'misc'
-                        dest_folder = self.downloads_path / "Misc"
-                    else:
-                        dest_folder = self.organization_rules[category]['destination']
-                        
-                    # Create destination folder
-                    dest_folder.mkdir(parents=True, exist_ok=True)
+                    category, dest_folder = self._ext_to_category.get(info.suffix.lower(), self._misc_category)
                     
                     # Move file
-                    dest_file = dest_folder / source_path.name
-                    if dest_file.exists():
-                        # Add timestamp to avoid conflicts
-                        timestamp = datetime.now().strftime("_%Y%m%d_%H%M%S")
-                        name_parts = source_path.stem, timestamp, source_path.suffix
-                        dest_file = dest_folder / "".join(name_parts)
+                    dest_file = dest_folder / info.name
+                    while dest_file.exists():
+                        # Add a per-folder counter to avoid conflicts
+                        n = next(self._conflict_counters[dest_folder])
+                        dest_file = dest_folder / f"{info.stem}_{n}{info.suffix}"
                         
-                    await asyncio.to_thread(shutil.move, source_path, dest_file)
+                    same_device = folder_devices.get(dest_folder) == info.device
+                    await asyncio.to_thread(_rename_or_move, source_path, dest_file, same_device)
                     
                     if category not in organized_files:
                         organized_files[category] = []
                     organized_files[category].append(str(dest_file))
                     
-                    logger.info(f"Organized {source_path.name} -> {category} folder")
+                    logger.info(f"Organized {info.name} -> {category} folder")
                     
                 except Exception as e:
                     error_msg = f"Failed to organize {source_path}: {e}"
@@ -282,48 +511,87 @@ class EnhancedActionExecutor:
             logger.error(f"Organization operation failed: {e}")
             return {"success": False, "error": str(e)}
             
+    def _get_hash_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Return the hashing process pool, creating it on first use"""
+        if self._hash_pool is None:
+            self._hash_pool = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._hash_pool
+        
+    def close(self):
+        """Shut down the hashing process pool so its workers don't outlive the executor"""
+        if self._hash_pool is not None:
+            self._hash_pool.shutdown(wait=False, cancel_futures=True)
+            self._hash_pool = None
+            
     async def _cleanup_duplicates(self, sources: List[str]) -> Dict:
         """Find and remove duplicate files"""
         try:
-            source_paths = self._expand_glob_patterns(sources)
+            source_infos = self._expand_file_infos(sources)
             
-            if not source_paths:
+            if not source_infos:
                 return {"success": False, "error": "No source files found for cleanup"}
                 
             # Group files by size first (quick filter)
             size_groups = {}
-            for path in source_paths:
-                if path.is_file():
-                    size = path.stat().st_size
-                    if size not in size_groups:
-                        size_groups[size] = []
-                    size_groups[size].append(path)
+            for info in source_infos:
+                if info.is_file:
+                    if info.size not in size_groups:
+                        size_groups[info.size] = []
+                    size_groups[info.size].append(info.path)
                     
-            # Find duplicates by comparing content
-            duplicates = []
+            # Narrow same-size files down by head/tail bytes before full compare
+            quick_groups = []
             for size, paths in size_groups.items():
                 if len(paths) > 1:
-                    # Compare file contents for same-size files
-                    compared = set()
-                    for i, path1 in enumerate(paths):
-                        if path1 in compared:
+                    signatures = await asyncio.gather(
+                        *(asyncio.to_thread(_quick_signature, p) for p in paths),
+                        return_exceptions=True
+                    )
+                    sig_groups = {}
+                    for path, signature in zip(paths, signatures):
+                        if isinstance(signature, Exception):
+                            logger.error(f"Could not read {path}: {signature}")
                             continue
-                        duplicate_group = [path1]
-                        for path2 in paths[i+1:]:
-                            if path2 in compared:
-                                continue
-                            if await self._files_are_identical(path1, path2):
-                                duplicate_group.append(path2)
-                                compared.add(path2)
-                        if len(duplicate_group) > 1:
-                            duplicates.append(duplicate_group)
-                            
+                        sig_groups.setdefault(signature, []).append(path)
+                    quick_groups.extend((size, g) for g in sig_groups.values() if len(g) > 1)
+                    
+            # Confirm duplicates by content: compare pairs directly, hash larger groups
+            duplicates = []
+            for size, paths in quick_groups:
+                if len(paths) == 2:
+                    # A pair is cheaper to compare byte-wise (stops at the first difference)
+                    try:
+                        if await asyncio.to_thread(filecmp.cmp, paths[0], paths[1], shallow=False):
+                            duplicates.append(paths)
+                    except OSError as e:
+                        logger.error(f"Could not compare {paths[0]} and {paths[1]}: {e}")
+                    continue
+                    
+                if len(paths) * size >= PROCESS_HASH_MIN_BYTES:
+                    # Large groups are CPU-bound: spread hashing across cores
+                    loop = asyncio.get_running_loop()
+                    pool = self._get_hash_pool()
+                    jobs = [loop.run_in_executor(pool, _full_hash, str(p)) for p in paths]
+                else:
+                    jobs = [asyncio.to_thread(_full_hash, p) for p in paths]
+                hashes = await asyncio.gather(*jobs, return_exceptions=True)
+                hash_groups = defaultdict(list)
+                for path, file_hash in zip(paths, hashes):
+                    if isinstance(file_hash, Exception):
+                        logger.error(f"Could not hash {path}: {file_hash}")
+                        continue
+                    hash_groups[file_hash].append(path)
+                duplicates.extend(g for g in hash_groups.values() if len(g) > 1)
+                        
+            filecmp.clear_cache()
+                        
             # Remove duplicates (keep the one with the shortest path)
             removed_files = []
             for duplicate_group in duplicates:
-                # Sort by path length, keep the shortest
-                duplicate_group.sort(key=lambda p: len(str(p)))
-                for duplicate in duplicate_group[1:]:  # Remove all but the first
+                keep = min(duplicate_group, key=lambda p: len(str(p)))
+                for duplicate in duplicate_group:
+                    if duplicate is keep:
+                        continue
                     try:
                         await asyncio.to_thread(duplicate.unlink)
                         removed_files.append(str(duplicate))
@@ -342,27 +610,6 @@ class EnhancedActionExecutor:
             logger.error(f"Cleanup operation failed: {e}")
             return {"success": False, "error": str(e)}
             
-    async def _files_are_identical(self, file1: Path, file2: Path) -> bool:
-        """Compare two files to check if they're identical"""
-        try:
-            import hashlib
-            
-            def get_file_hash(filepath):
-                hash_md5 = hashlib.md5()
-                with open(filepath, "rb") as f:
-                    for chunk in iter(lambda: f.read(4096), b""):
-                        hash_md5.update(chunk)
-                return hash_md5.hexdigest()
-                
-            hash1 = await asyncio.to_thread(get_file_hash, file1)
-            hash2 = await asyncio.to_thread(get_file_hash, file2)
-            
-            return hash1 == hash2
-            
-        except Exception as e:
-            logger.error(f"File comparison failed: {e}")
-            return False
-            
     async def execute(self, command: Dict) -> Dict:
         """Execute enhanced file system command with intelligence"""
         try:
@@ -432,43 +679,44 @@ class EnhancedActionExecutor:
             if not self._validate_path(dest_path):
                 return {"success": False, "error": "Invalid destination path"}
                 
-            dest_path.mkdir(parents=True, exist_ok=True)
             source_paths = self._expand_glob_patterns(sources)
             
             if not source_paths:
                 return {"success": False, "error": "No source files found"}
                 
+            dest_path.mkdir(parents=True, exist_ok=True)
+            
             copied_files = []
             errors = []
+            pairs = []
             
             for source_path in source_paths:
-                try:
-                    if not self._validate_path(source_path):
-                        errors.append(f"Invalid source path: {source_path}")
-                        continue
-                        
-                    if not source_path.exists():
-                        errors.append(f"Source does not exist: {source_path}")
-                        continue
-                        
-                    if dest_path.is_dir():
-                        dest_file = dest_path / source_path.name
+                if not self._validate_path(source_path):
+                    errors.append(f"Invalid source path: {source_path}")
+                    continue
+                    
+                if not source_path.exists():
+                    errors.append(f"Source does not exist: {source_path}")
+                    continue
+                    
+                if dest_path.is_dir():
+                    pairs.append((source_path, dest_path / source_path.name))
+                else:
+                    pairs.append((source_path, dest_path))
+                    
+            for batch in _batched(pairs):
+                results = await asyncio.gather(
+                    *(asyncio.to_thread(_copy_one, src, dst, self.preserve_metadata)
+                      for src, dst in batch)
+                )
+                for src, dst, error in results:
+                    if error:
+                        error_msg = f"Failed to copy {src}: {error}"
+                        errors.append(error_msg)
+                        logger.error(error_msg)
                     else:
-                        dest_file = dest_path
-                        
-                    if source_path.is_file():
-                        await asyncio.to_thread(shutil.copy2, source_path, dest_file)
-                        copied_files.append(str(source_path))
-                        logger.info(f"Copied file: {source_path} -> {dest_file}")
-                    elif source_path.is_dir():
-                        await asyncio.to_thread(shutil.copytree, source_path, dest_file, dirs_exist_ok=True)
-                        copied_files.append(str(source_path))
-                        logger.info(f"Copied directory: {source_path} -> {dest_file}")
-                        
-                except Exception as e:
-                    error_msg = f"Failed to copy {source_path}: {e}"
-                    errors.append(error_msg)
-                    logger.error(error_msg)
+                        copied_files.append(str(src))
+                        logger.info(f"Copied: {src} -> {dst}")
                     
             if copied_files:
                 message = f"Copied {len(copied_files)} items to {dest_path}"
@@ -490,20 +738,34 @@ class EnhancedActionExecutor:
             if not self._validate_path(dest_path):
                 return {"success": False, "error": "Invalid destination path"}
                 
-            dest_path.mkdir(parents=True, exist_ok=True)
             source_paths = self._expand_glob_patterns(sources)
             
             if not source_paths:
                 return {"success": False, "error": "No source files found"}
                 
+            dest_path.mkdir(parents=True, exist_ok=True)
+            
+            pairs = [
+                (source_path, dest_path / source_path.name)
+                for source_path in source_paths
+                if source_path.exists() and self._validate_path(source_path)
+            ]
+            
             moved_files = []
-            for source_path in source_paths:
-                if source_path.exists() and self._validate_path(source_path):
-                    dest_file = dest_path / source_path.name
-                    await asyncio.to_thread(shutil.move, source_path, dest_file)
-                    moved_files.append(str(source_path))
-                    
-            return {"success": True, "message": f"Moved {len(moved_files)} items", "moved": moved_files}
+            errors = []
+            for batch in _batched(pairs):
+                results = await asyncio.gather(
+                    *(asyncio.to_thread(_move_one, src, dst) for src, dst in batch)
+                )
+                for src, dst, error in results:
+                    if error:
+                        error_msg = f"Failed to move {src}: {error}"
+                        errors.append(error_msg)
+                        logger.error(error_msg)
+                    else:
+                        moved_files.append(str(src))
+                        
+            return {"success": True, "message": f"Moved {len(moved_files)} items", "moved": moved_files, "errors": errors}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -512,17 +774,30 @@ class EnhancedActionExecutor:
         """Delete files (basic implementation)"""
         try:
             source_paths = self._expand_glob_patterns(sources)
-            deleted_files = []
             
-            for source_path in source_paths:
-                if source_path.exists() and self._validate_path(source_path):
-                    if source_path.is_file():
-                        await asyncio.to_thread(source_path.unlink)
-                    elif source_path.is_dir():
-                        await asyncio.to_thread(shutil.rmtree, source_path)
-                    deleted_files.append(str(source_path))
-                    
-            return {"success": True, "message": f"Deleted {len(deleted_files)} items", "deleted": deleted_files}
+            if not source_paths:
+                return {"success": False, "error": "No source files found"}
+                
+            targets = [
+                source_path for source_path in source_paths
+                if source_path.exists() and self._validate_path(source_path)
+            ]
+            
+            deleted_files = []
+            errors = []
+            for batch in _batched(targets):
+                results = await asyncio.gather(
+                    *(asyncio.to_thread(_delete_one, path) for path in batch)
+                )
+                for path, error in results:
+                    if error:
+                        error_msg = f"Failed to delete {path}: {error}"
+                        errors.append(error_msg)
+                        logger.error(error_msg)
+                    else:
+                        deleted_files.append(str(path))
+                        
+            return {"success": True, "message": f"Deleted {len(deleted_files)} items", "deleted": deleted_files, "errors": errors}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -533,19 +808,33 @@ class EnhancedActionExecutor:
             if not sources:
                 sources = [str(self.downloads_path)]
                 
+            filter_pattern = parameters.get('filter', '*') if parameters else '*'
+            # Like Path.glob, wildcards don't match hidden files unless asked for
+            include_hidden = filter_pattern.startswith('.')
+            matcher = _compile_glob(filter_pattern)
+            
+            def list_dir(source_path):
+                entries = []
+                with os.scandir(source_path) as it:
+                    for entry in it:
+                        if entry.name.startswith('.') and not include_hidden:
+                            continue
+                        if not matcher(entry.name):
+                            continue
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        entries.append({
+                            "name": entry.name,
+                            "path": entry.path,
+                            "type": "directory" if is_dir else "file",
+                            "size": None if is_dir else entry.stat(follow_symlinks=False).st_size
+                        })
+                return entries
+                
             all_files = []
             for source in sources:
                 source_path = self._resolve_path(source)
                 if source_path.exists() and source_path.is_dir():
-                    filter_pattern = parameters.get('filter', '*') if parameters else '*'
-                    files = list(source_path.glob(filter_pattern))
-                    for file_path in files:
-                        all_files.append({
-                            "name": file_path.name,
-                            "path": str(file_path),
-                            "type": "directory" if file_path.is_dir() else "file",
-                            "size": file_path.stat().st_size if file_path.is_file() else None
-                        })
+                    all_files.extend(await asyncio.to_thread(list_dir, source_path))
                         
             return {"success": True, "message": f"Found {len(all_files)} items", "files": all_files}
             
@@ -573,14 +862,19 @@ class EnhancedActionExecutor:
             if not search_path.exists():
                 return {"success": False, "error": "Search path does not exist"}
                 
-            found_files = []
-            for file_path in search_path.rglob('*'):
-                if query.lower() in file_path.name.lower():
-                    found_files.append({
-                        "name": file_path.name,
-                        "path": str(file_path),
-                        "type": "directory" if file_path.is_dir() else "file"
-                    })
+            def search():
+                q = query.lower()
+                matches = []
+                for entry, _ in _iter_scandir(search_path):
+                    if q in entry.name.lower():
+                        matches.append({
+                            "name": entry.name,
+                            "path": entry.path,
+                            "type": "directory" if entry.is_dir(follow_symlinks=False) else "file"
+                        })
+                return matches
+                
+            found_files = await asyncio.to_thread(search)
                     
             return {"success": True, "message": f"Found {len(found_files)} items matching '{query}'", "files": found_files}
             
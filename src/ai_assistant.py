@@ -9,14 +9,286 @@
 """
 
 import os
+import sys
 import json
 import requests
 import subprocess
 import time
+import heapq
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 import threading
+import atexit
+import queue
+import io
+import tempfile
+import contextlib
+import traceback
+import multiprocessing
+import asyncio
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from io_pool import IO_EXECUTOR
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
+# Maximal gleichzeitige Claude-Anfragen in process_batch
+CLAUDE_MAX_CONNECTIONS = 16
+
+# Speicherlimit für den Python-Worker von execute_code
+PY_WORKER_MEMORY_LIMIT = 1024 * 1024 * 1024
+# Nach so vielen Snippets wird der Worker neu gestartet (z.B. importierte Module, C-Zustand)
+PY_WORKER_MAX_RUNS = 50
+
+KB_PATH = Path("../data/thor_knowledge.json")
+# Interner Cache der Wissensbasis (msgpack); KB_PATH bleibt als lesbarer JSON-Export
+KB_CACHE_PATH = KB_PATH.with_suffix(".mpk")
+# Neue Einträge werden angehängt und erst nach so vielen Einträgen in KB_PATH übernommen
+KB_LOG_PATH = KB_PATH.with_suffix(".log")
+KB_COMPACT_EVERY = 50
+# Der Schreib-Thread sammelt bis zu so viele Einträge bzw. so lange, bevor er schreibt
+KB_WRITE_BATCH_SIZE = 32
+KB_WRITE_BATCH_SECONDS = 0.5
+
+# Hinweise auf komplexe Aufgaben, die an Claude gehen sollen
+COMPLEX_INDICATORS = [
+    "programmier", "code", "schreib", "erstell", "entwickl",
+    "analysier", "erkläre", "wie funktioniert", "warum",
+    "löse", "problem", "fehler", "debug", "optimier",
+    "recherchier", "such", "find heraus", "lern",
+    "übersetz", "konvertier", "transformier"
+]
+
+# Schlüsselwörter für die lokale Verarbeitung in process_complex_task
+ROUTING_KEYWORDS = {
+    "file": ["datei", "file"],
+    "read": ["lesen", "read"],
+    "write": ["schreiben", "write"],
+    "code": ["code", "programm"],
+    "analyze": ["analysier"],
+    "capabilities": ["was kannst du", "fähigkeiten"]
+}
+
+
+def _build_keyword_categories() -> Dict[str, frozenset]:
+    """Ordne jedem Schlüsselwort seine Kategorien zu ('complex' = KI-Fallback)"""
+    categories = defaultdict(set)
+    for keyword in COMPLEX_INDICATORS:
+        categories[keyword].add("complex")
+    for category, keywords in ROUTING_KEYWORDS.items():
+        for keyword in keywords:
+            categories[keyword].add(category)
+    return {keyword: frozenset(cats) for keyword, cats in categories.items()}
+
+
+_KEYWORD_CATEGORIES = _build_keyword_categories()
+
+if AHOCORASICK_AVAILABLE:
+    # Ein Automat für alle Schlüsselwörter: ein linearer Durchlauf pro Eingabe
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword, _cats in _KEYWORD_CATEGORIES.items():
+        _KEYWORD_AUTOMATON.add_word(_keyword, _cats)
+    _KEYWORD_AUTOMATON.make_automaton()
+    
+# Regex-Fallback findet keine überlappenden Treffer, daher erbt jedes Wort die
+# Kategorien der in ihm enthaltenen Wörter ("schreiben" enthält "schreib")
+_KEYWORD_CATEGORIES_CLOSED = {
+    keyword: frozenset().union(*(cats for other, cats in _KEYWORD_CATEGORIES.items() if other in keyword))
+    for keyword in _KEYWORD_CATEGORIES
+}
+_KEYWORD_RE = re.compile("|".join(
+    re.escape(keyword) for keyword in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)
+))
+
+
+def _scan_keywords(text_lower: str) -> Counter:
+    """Zähle Kategorie-Treffer aller Schlüsselwörter in einem Durchlauf"""
+    counts = Counter()
+    if AHOCORASICK_AVAILABLE:
+        for _, cats in _KEYWORD_AUTOMATON.iter(text_lower):
+            counts.update(cats)
+    else:
+        for match in _KEYWORD_RE.finditer(text_lower):
+            counts.update(_KEYWORD_CATEGORIES_CLOSED[match.group()])
+    return counts
+
+
+def _route_task(categories: Counter) -> Optional[str]:
+    """Wähle die Route für process_complex_task aus den erkannten Kategorien"""
+    if "complex" in categories:
+        return "complex"
+    if "file" in categories:
+        if "read" in categories:
+            return "file_read"
+        if "write" in categories:
+            return "file_write"
+    for route in ("code", "analyze", "capabilities"):
+        if route in categories:
+            return route
+    return None
+
+
+# Lernmuster in Antworten, alle Kategorien in einem Durchlauf erkannt
+LEARN_PATTERN_NAMES = ("code_example", "explanation", "step_by_step", "problem_solving")
+_LEARN_PATTERN_RE = re.compile(
+    r"(?P<code_example>```)"
+    r"|(?P<explanation>\b(?:weil|da|deshalb|daher)\b)"
+    r"|(?P<step_by_step>\b(?:schritt|zuerst|dann|danach))"
+    r"|(?P<problem_solving>\b(?:problem|lösung|fehler|beheben))",
+    re.IGNORECASE
+)
+
+_SPACE_TO_UNDERSCORE = str.maketrans(" ", "_")
+
+# Wortstämme für die einfache Sentiment-Analyse; passen am Wortanfang, also auch
+# auf gebeugte Formen ("gute", "tolles", "schlechter")
+POSITIVE_WORDS = ("gut", "toll", "super", "fantastisch", "perfekt")
+NEGATIVE_WORDS = ("schlecht", "schlimm", "furchtbar", "schrecklich")
+_SENTIMENT_RE = re.compile(
+    r"\b(?:(" + "|".join(POSITIVE_WORDS) + r")|(" + "|".join(NEGATIVE_WORDS) + r"))"
+)
+
+# Wie viele gelernte Einträge maximal in einen Prompt kommen
+KB_PROMPT_ENTRIES = 5
+KB_SUMMARY_CHARS = 500
+
+
+@dataclass(frozen=True, slots=True)
+class Task:
+    """Eine Anfrage, einmal kleingeschrieben und in Wörter zerlegt"""
+    raw: str
+    lower: str
+    tokens: frozenset
+    
+    @classmethod
+    def from_text(cls, text: str) -> "Task":
+        lower = text.lower()
+        return cls(text, lower, frozenset(lower.split()))
+        
+        
+def _as_task(task: Union[str, Task]) -> Task:
+    """Akzeptiere Rohtext oder eine bereits vorbereitete Task"""
+    return task if isinstance(task, Task) else Task.from_text(task)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialisiere nach JSON (orjson wenn verfügbar)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    
+    
+def _json_loads(data: bytes):
+    """Lese JSON (orjson wenn verfügbar)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _kb_store_path() -> Path:
+    """Hauptdatei der Wissensbasis (msgpack-Cache, sonst JSON)"""
+    return KB_CACHE_PATH if MSGPACK_AVAILABLE else KB_PATH
+
+
+def _kb_pack(obj) -> bytes:
+    """Serialisiere die Wissensbasis für die Hauptdatei"""
+    if MSGPACK_AVAILABLE:
+        return msgpack.packb(obj, use_bin_type=True)
+    return _json_dumps(obj)
+
+
+def _run_snippet(code: str) -> Dict:
+    """Führe ein Snippet aus; stdout/stderr werden auf Dateideskriptor-Ebene mitgeschnitten"""
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        saved_fds = os.dup(1), os.dup(2)
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        # Ungepufferte Streams auf fd 1/2, damit print und os.system/Subprozesse in Reihenfolge landen
+        stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding="utf-8", write_through=True)
+        stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding="utf-8", write_through=True)
+        returncode = 0
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    exec(compile(code, "<thor>", "exec"), {"__name__": "__main__"})
+                except SystemExit as e:
+                    returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except BaseException:
+                    traceback.print_exc()
+                    returncode = 1
+        finally:
+            stdout.flush()
+            stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            os.close(saved_fds[0])
+            os.close(saved_fds[1])
+            
+        out.seek(0)
+        err.seek(0)
+        return {
+            "stdout": out.read().decode("utf-8", "replace"),
+            "stderr": err.read().decode("utf-8", "replace"),
+            "returncode": returncode
+        }
+
+
+def _sandbox_loop(conn):
+    """Langlebiger Worker-Prozess: führt Python-Code aus und liefert stdout/stderr zurück"""
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (PY_WORKER_MEMORY_LIMIT, PY_WORKER_MEMORY_LIMIT))
+    except (ImportError, ValueError, OSError):
+        pass
+        
+    # Ausgangszustand, auf den nach jedem Snippet zurückgesetzt wird
+    cwd = os.getcwd()
+    environ = dict(os.environ)
+    sys_path = list(sys.path)
+    
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+            
+        try:
+            result = _run_snippet(request["code"])
+        finally:
+            os.chdir(cwd)
+            if os.environ != environ:
+                os.environ.clear()
+                os.environ.update(environ)
+            sys.path[:] = sys_path
+        conn.send(result)
+
 
 class AIAssistant:
     """Intelligenter KI-Assistent mit Claude Fallback"""
@@ -27,9 +299,38 @@ class AIAssistant:
         
         # Lernsystem
         self.knowledge_base = {}
+        # Suchindex über die Wissensbasis als parallele Listen (eine Zeile pro Eintrag)
+        # plus invertierter Index Token -> Zeilen, damit nur passende Einträge bewertet werden
+        self._kb_keys = []
+        self._kb_row_tokens = []
+        self._kb_snippets = []
+        self._kb_rows = {}
+        self._kb_postings = defaultdict(set)
+        # Append-Log für neue Einträge (wird lazy geöffnet)
+        self._kb_log = None
+        self._kb_log_entries = 0
+        # Persistenz läuft in einem eigenen Thread, damit Antworten nicht auf die Platte warten
+        self._kb_lock = threading.Lock()
+        self._save_q = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="thor-kb-writer", daemon=True)
         self.conversation_history = []
         self.learned_patterns = []
         
+        # Persistente HTTP-Session (Keep-Alive, TLS-Handshake nur einmal)
+        self._claude_headers = {
+            "Content-Type": "application/json",
+            "x-api-key": self.anthropic_api_key,
+            "anthropic-version": "2023-06-01"
+        }
+        self._http = requests.Session()
+        self._http.headers.update(self._claude_headers)
+        
+        # Python-Worker für execute_code (wird beim ersten Aufruf gestartet)
+        self._py_worker = None
+        self._py_conn = None
+        self._py_runs = 0
+        self._py_lock = threading.Lock()
+        
         # Tool-Verfügbarkeit
         self.available_tools = {
             "file_operations": True,
@@ -42,41 +343,189 @@ class AIAssistant:
         
         # Lade vorhandenes Wissen
         self.load_knowledge_base()
+        self._writer.start()
+        atexit.register(self.close)
+        
+    @property
+    def anthropic_api_key(self) -> str:
+        return self._anthropic_api_key
         
+    @anthropic_api_key.setter
+    def anthropic_api_key(self, value: str):
+        """Setze den API-Key; Header und Fähigkeiten-Zusammenfassung folgen"""
+        self._anthropic_api_key = value
+        self._cap_summary = None
+        if hasattr(self, "_http"):
+            self._claude_headers["x-api-key"] = value
+            self._http.headers["x-api-key"] = value
+            
     def load_knowledge_base(self):
         """Lade gespeicherte Wissensbasis"""
-        kb_path = Path("../data/thor_knowledge.json")
-        if kb_path.exists():
+        try:
+            if MSGPACK_AVAILABLE and KB_CACHE_PATH.exists():
+                self.knowledge_base = msgpack.unpackb(KB_CACHE_PATH.read_bytes(), raw=False)
+            elif KB_PATH.exists():
+                # Alte JSON-Datei übernehmen, beim nächsten Kompaktieren entsteht der Cache
+                self.knowledge_base = _json_loads(KB_PATH.read_bytes())
+        except Exception as e:
+            print(f"⚠️ Fehler beim Laden der Wissensbasis: {e}")
+                
+        # Noch nicht kompaktierte Einträge nachspielen
+        if KB_LOG_PATH.exists():
             try:
-                with open(kb_path, 'r', encoding='utf-8') as f:
-                    self.knowledge_base = json.load(f)
-                print(f"📚 Wissensbasis geladen: {len(self.knowledge_base)} Einträge")
+                with open(KB_LOG_PATH, 'rb') as f:
+                    for line in f:
+                        if line.strip():
+                            record = _json_loads(line)
+                            self.knowledge_base[record["key"]] = record["entry"]
+                            self._kb_log_entries += 1
             except Exception as e:
-                print(f"⚠️ Fehler beim Laden der Wissensbasis: {e}")
+                print(f"⚠️ Fehler beim Lesen des Wissens-Logs: {e}")
+                
+        for key, entry in self.knowledge_base.items():
+            self._index_knowledge_entry(key, entry)
+        if self.knowledge_base:
+            print(f"📚 Wissensbasis geladen: {len(self.knowledge_base)} Einträge")
                 
     def save_knowledge_base(self):
         """Speichere Wissensbasis"""
-        kb_path = Path("../data/thor_knowledge.json")
+        self.compact_knowledge_base()
+        
+    def compact_knowledge_base(self):
+        """Schreibe die komplette Wissensbasis atomar und leere das Append-Log"""
+        kb_path = _kb_store_path()
         kb_path.parent.mkdir(exist_ok=True)
+        tmp_path = kb_path.with_suffix(".tmp")
         try:
-            with open(kb_path, 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_base, f, ensure_ascii=False, indent=2)
+            with self._kb_lock:
+                # Zeitstempel erst hier lesbar formatieren (Einträge speichern time.time())
+                for entry in self.knowledge_base.values():
+                    if "ts" in entry:
+                        entry["timestamp"] = datetime.fromtimestamp(entry.pop("ts")).isoformat()
+                tmp_path.write_bytes(_kb_pack(self.knowledge_base))
+                os.replace(tmp_path, kb_path)
+                if self._kb_log:
+                    self._kb_log.close()
+                    self._kb_log = None
+                KB_LOG_PATH.unlink(missing_ok=True)
+                self._kb_log_entries = 0
             print("💾 Wissensbasis gespeichert")
         except Exception as e:
             print(f"⚠️ Fehler beim Speichern der Wissensbasis: {e}")
             
-    def should_use_ai_fallback(self, task: str) -> bool:
+    def export_json(self, path: Optional[Path] = None) -> Path:
+        """Exportiere die Wissensbasis als eingerücktes JSON (zum Debuggen)"""
+        path = Path(path) if path else KB_PATH
+        path.parent.mkdir(exist_ok=True)
+        with self._kb_lock:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.knowledge_base, f, ensure_ascii=False, indent=2)
+        print(f"📄 Wissensbasis exportiert: {path}")
+        return path
+        
+    def flush_knowledge_base(self):
+        """Übernimm ausstehende Log-Einträge in die Hauptdatei"""
+        if self._kb_log_entries:
+            self.compact_knowledge_base()
+            
+    def close(self):
+        """Warte auf ausstehende Schreibvorgänge und kompaktiere die Wissensbasis"""
+        if self._writer.is_alive():
+            self._save_q.put(None)
+            self._writer.join(timeout=5)
+        self.flush_knowledge_base()
+        self._stop_python_worker()
+        
+    def _writer_loop(self):
+        """Hintergrund-Thread: sammle gelernte Einträge und schreibe sie gebündelt"""
+        while True:
+            batch = [self._save_q.get()]
+            deadline = time.monotonic() + KB_WRITE_BATCH_SECONDS
+            while batch[-1] is not None and len(batch) < KB_WRITE_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._save_q.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                    
+            keys = [key for key in batch if key is not None]
+            if keys:
+                self._append_knowledge(keys)
+            if len(keys) < len(batch):
+                return
+                
+    def _append_knowledge(self, keys: List[str]):
+        """Hänge Einträge an das Log an (O(Einträge) statt komplettem Neuschreiben)"""
+        try:
+            with self._kb_lock:
+                if self._kb_log is None:
+                    KB_LOG_PATH.parent.mkdir(exist_ok=True)
+                    self._kb_log = open(KB_LOG_PATH, 'ab')
+                for key in keys:
+                    self._kb_log.write(_json_dumps({"key": key, "entry": self.knowledge_base[key]}) + b"\n")
+                self._kb_log.flush()
+                self._kb_log_entries += len(keys)
+        except Exception as e:
+            print(f"⚠️ Fehler beim Speichern der Wissensbasis: {e}")
+            return
+            
+        if self._kb_log_entries >= KB_COMPACT_EVERY:
+            self.compact_knowledge_base()
+            
+    def _index_knowledge_entry(self, key: str, entry: Dict, tokens: Optional[frozenset] = None):
+        """Nimm einen Eintrag in den Suchindex auf"""
+        task = entry.get("task", "")
+        if tokens is None:
+            tokens = frozenset(task.lower().split())
+        snippet = json.dumps(
+            {"task": task, "response": entry.get("response", "")[:KB_SUMMARY_CHARS]},
+            ensure_ascii=False
+        )
+        
+        row = self._kb_rows.get(key)
+        if row is None:
+            row = self._kb_rows[key] = len(self._kb_keys)
+            self._kb_keys.append(key)
+            self._kb_row_tokens.append(tokens)
+            self._kb_snippets.append(snippet)
+        else:
+            # Überschriebener Eintrag: alte Token aus dem invertierten Index nehmen
+            for token in self._kb_row_tokens[row] - tokens:
+                self._kb_postings[token].discard(row)
+            self._kb_row_tokens[row] = tokens
+            self._kb_snippets[row] = snippet
+            
+        for token in tokens:
+            self._kb_postings[token].add(row)
+        
+    def get_relevant_knowledge(self, task: Union[str, Task], k: int = KB_PROMPT_ENTRIES) -> str:
+        """Wähle die k Einträge mit der größten Wort-Überschneidung zur Aufgabe"""
+        scores = Counter()
+        for token in _as_task(task).tokens:
+            rows = self._kb_postings.get(token)
+            if rows:
+                scores.update(rows)
+        top = heapq.nlargest(k, ((score, self._kb_keys[row], row) for row, score in scores.items()))
+        return "\n".join(self._kb_snippets[row] for _, _, row in top)
+        
+    def should_use_ai_fallback(self, task: Union[str, Task]) -> bool:
         """Entscheide ob KI-Fallback verwendet werden soll"""
-        complex_indicators = [
-            "programmier", "code", "schreib", "erstell", "entwickl",
-            "analysier", "erkläre", "wie funktioniert", "warum",
-            "löse", "problem", "fehler", "debug", "optimier",
-            "recherchier", "such", "find heraus", "lern",
-            "übersetz", "konvertier", "transformier"
-        ]
+        return "complex" in _scan_keywords(_as_task(task).lower)
         
-        task_lower = task.lower()
-        return any(indicator in task_lower for indicator in complex_indicators)
+    def _claude_request_body(self, prompt: str, system_prompt: str = "") -> Dict:
+        """Baue den Request-Body für die Claude API"""
+        data = {
+            "model": "claude-3-sonnet-20240229",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        
+        if system_prompt:
+            data["system"] = system_prompt
+            
+        return data
         
     def call_claude_api(self, prompt: str, system_prompt: str = "") -> str:
         """Rufe Claude API auf"""
@@ -84,25 +533,30 @@ class AIAssistant:
             return "❌ Anthropic API Key nicht gefunden. Bitte in .env setzen."
             
         try:
-            url = "https://api.anthropic.com/v1/messages"
-            headers = {
-                "Content-Type": "application/json",
-                "x-api-key": self.anthropic_api_key,
-                "anthropic-version": "2023-06-01"
-            }
+            data = self._claude_request_body(prompt, system_prompt)
+            response = self._http.post(CLAUDE_API_URL, json=data, timeout=60)
+            
+            if response.status_code == 200:
+                result = response.json()
+                return result["content"][0]["text"]
+            else:
+                return f"❌ Claude API Fehler: {response.status_code}"
+                
+        except Exception as e:
+            return f"❌ Fehler bei Claude API: {str(e)}"
             
-            messages = [{"role": "user", "content": prompt}]
+    async def call_claude_api_async(self, prompt: str, system_prompt: str = "", client=None) -> str:
+        """Rufe Claude API asynchron auf (httpx-Client oder Thread-Fallback)"""
+        if client is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(IO_EXECUTOR, self.call_claude_api, prompt, system_prompt)
             
-            data = {
-                "model": "claude-3-sonnet-20240229",
-                "max_tokens": 4000,
-                "messages": messages
-            }
+        if not self.anthropic_api_key:
+            return "❌ Anthropic API Key nicht gefunden. Bitte in .env setzen."
             
-            if system_prompt:
-                data["system"] = system_prompt
-                
-            response = requests.post(url, headers=headers, json=data)
+        try:
+            data = self._claude_request_body(prompt, system_prompt)
+            response = await client.post(CLAUDE_API_URL, json=data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -113,8 +567,8 @@ class AIAssistant:
         except Exception as e:
             return f"❌ Fehler bei Claude API: {str(e)}"
             
-    def process_with_ai(self, task: str, context: str = "") -> str:
-        """Verarbeite Aufgabe mit KI-Fallback"""
+    def _build_prompts(self, task: Task, context: str = "") -> tuple:
+        """Baue (Prompt, System-Prompt) für eine Aufgabe"""
         
         # System-Prompt für THOR
         system_prompt = """Du bist THOR, ein intelligenter KI-Assistent. 
@@ -134,15 +588,22 @@ class AIAssistant:
         
         # Erweitere Prompt mit Kontext
         full_prompt = f"""
-        Aufgabe: {task}
+        Aufgabe: {task.raw}
         
         Kontext: {context}
         
-        Bisheriges Wissen: {json.dumps(self.knowledge_base, ensure_ascii=False, indent=2)}
+        Bisheriges Wissen: {self.get_relevant_knowledge(task) or "keins"}
         
         Bitte führe die Aufgabe aus und erkläre deine Schritte.
         """
         
+        return full_prompt, system_prompt
+        
+    def process_with_ai(self, task: Union[str, Task], context: str = "") -> str:
+        """Verarbeite Aufgabe mit KI-Fallback"""
+        task = _as_task(task)
+        full_prompt, system_prompt = self._build_prompts(task, context)
+        
         # Rufe Claude auf
         response = self.call_claude_api(full_prompt, system_prompt)
         
@@ -151,44 +612,52 @@ class AIAssistant:
         
         return response
         
-    def learn_from_response(self, task: str, response: str):
+    async def process_with_ai_async(self, task: Union[str, Task], context: str = "", client=None) -> str:
+        """Asynchrone Variante von process_with_ai"""
+        task = _as_task(task)
+        full_prompt, system_prompt = self._build_prompts(task, context)
+        response = await self.call_claude_api_async(full_prompt, system_prompt, client)
+        self.learn_from_response(task, response)
+        return response
+        
+    async def process_batch(self, tasks: List[str], context: str = "") -> List[str]:
+        """Verarbeite mehrere Aufgaben parallel (Wartezeit ~ langsamste statt Summe)"""
+        if not HTTPX_AVAILABLE:
+            return await asyncio.gather(*(self.process_with_ai_async(t, context) for t in tasks))
+            
+        limits = httpx.Limits(max_connections=CLAUDE_MAX_CONNECTIONS)
+        async with httpx.AsyncClient(headers=self._claude_headers, limits=limits, timeout=60.0) as client:
+            return await asyncio.gather(*(self.process_with_ai_async(t, context, client) for t in tasks))
+            
+    def learn_from_response(self, task: Union[str, Task], response: str):
         """Lerne von KI-Antworten"""
+        task = _as_task(task)
+        
         # Extrahiere Wissen aus der Antwort
         knowledge_entry = {
-            "task": task,
+            "task": task.raw,
             "response": response,
-            "timestamp": datetime.now().isoformat(),
+            "ts": time.time(),
             "learned_patterns": self.extract_patterns(response)
         }
         
         # Speichere in Wissensbasis
-        task_key = task.lower().replace(" ", "_")[:50]
-        self.knowledge_base[task_key] = knowledge_entry
+        task_key = task.lower[:50].translate(_SPACE_TO_UNDERSCORE)
+        with self._kb_lock:
+            self.knowledge_base[task_key] = knowledge_entry
+            self._index_knowledge_entry(task_key, knowledge_entry, task.tokens)
         
-        # Speichere automatisch
-        self.save_knowledge_base()
+        # Speichere automatisch (im Hintergrund)
+        self._save_q.put(task_key)
         
     def extract_patterns(self, text: str) -> List[str]:
         """Extrahiere Lernmuster aus Text"""
-        patterns = []
-        
-        # Code-Muster
-        if "```" in text:
-            patterns.append("code_example")
-            
-        # Erklärungsmuster
-        if any(word in text.lower() for word in ["weil", "da", "deshalb", "daher"]):
-            patterns.append("explanation")
-            
-        # Schritt-für-Schritt
-        if any(word in text.lower() for word in ["schritt", "zuerst", "dann", "danach"]):
-            patterns.append("step_by_step")
-            
-        # Problemlösung
-        if any(word in text.lower() for word in ["problem", "lösung", "fehler", "beheben"]):
-            patterns.append("problem_solving")
-            
-        return patterns
+        hits = set()
+        for match in _LEARN_PATTERN_RE.finditer(text):
+            hits.add(match.lastgroup)
+            if len(hits) == len(LEARN_PATTERN_NAMES):
+                break
+        return [name for name in LEARN_PATTERN_NAMES if name in hits]
         
     def execute_file_operation(self, operation: str, file_path: str, content: str = "") -> str:
         """Führe Dateioperationen aus"""
@@ -223,30 +692,59 @@ class AIAssistant:
         except Exception as e:
             return f"❌ Dateioperation fehlgeschlagen: {str(e)}"
             
+    def _stop_python_worker(self):
+        """Beende den Python-Worker (z.B. nach Timeout)"""
+        if self._py_worker is None:
+            return
+        try:
+            if self._py_worker.is_alive():
+                self._py_conn.send(None)
+                self._py_worker.join(timeout=1)
+        except Exception:
+            pass
+        if self._py_worker.is_alive():
+            self._py_worker.kill()
+            self._py_worker.join()
+        self._py_conn.close()
+        self._py_worker = None
+        self._py_conn = None
+        
+    def _run_python(self, code: str, timeout: float = 30) -> Dict:
+        """Führe Python-Code im langlebigen Worker aus (Interpreter-Start nur einmal)"""
+        with self._py_lock:
+            if (self._py_worker is None or not self._py_worker.is_alive()
+                    or self._py_runs >= PY_WORKER_MAX_RUNS):
+                self._stop_python_worker()
+                self._py_runs = 0
+                self._py_conn, child_conn = multiprocessing.Pipe()
+                self._py_worker = multiprocessing.Process(
+                    target=_sandbox_loop, args=(child_conn,), name="thor-python", daemon=True
+                )
+                self._py_worker.start()
+                child_conn.close()
+                
+            self._py_conn.send({"code": code})
+            self._py_runs += 1
+            if not self._py_conn.poll(timeout):
+                # Hängender Code: Worker verwerfen, beim nächsten Aufruf neu starten
+                self._stop_python_worker()
+                raise subprocess.TimeoutExpired("python", timeout)
+            try:
+                return self._py_conn.recv()
+            except EOFError:
+                self._stop_python_worker()
+                return {"stdout": "", "stderr": "Python-Worker abgestürzt", "returncode": 1}
+                
     def execute_code(self, code: str, language: str = "python") -> str:
         """Führe Code aus"""
         try:
             if language == "python":
-                # Erstelle temporäre Datei
-                temp_file = Path("temp_code.py")
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    f.write(code)
+                result = self._run_python(code, timeout=30)
                 
-                # Führe aus
-                result = subprocess.run(
-                    ["python", str(temp_file)],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                # Lösche temporäre Datei
-                temp_file.unlink(missing_ok=True)
-                
-                if result.returncode == 0:
-                    return f"✅ Code erfolgreich ausgeführt:\n{result.stdout}"
+                if result["returncode"] == 0:
+                    return f"✅ Code erfolgreich ausgeführt:\n{result['stdout']}"
                 else:
-                    return f"❌ Code-Fehler:\n{result.stderr}"
+                    return f"❌ Code-Fehler:\n{result['stderr']}"
                     
             elif language == "bash":
                 result = subprocess.run(
@@ -275,13 +773,14 @@ class AIAssistant:
     def analyze_text(self, text: str, analysis_type: str = "general") -> str:
         """Analysiere Text"""
         if analysis_type == "sentiment":
-            # Einfache Sentiment-Analyse
-            positive_words = ["gut", "toll", "super", "fantastisch", "perfekt"]
-            negative_words = ["schlecht", "schlimm", "furchtbar", "schrecklich"]
-            
-            text_lower = text.lower()
-            pos_count = sum(1 for word in positive_words if word in text_lower)
-            neg_count = sum(1 for word in negative_words if word in text_lower)
+            # Einfache Sentiment-Analyse (ein Regex-Durchlauf, jedes Wort der Listen zählt einmal)
+            positive, negative = set(), set()
+            for pos_word, neg_word in _SENTIMENT_RE.findall(text.lower()):
+                if pos_word:
+                    positive.add(pos_word)
+                else:
+                    negative.add(neg_word)
+            pos_count, neg_count = len(positive), len(negative)
             
             if pos_count > neg_count:
                 return "😊 Positives Sentiment erkannt"
@@ -291,20 +790,20 @@ class AIAssistant:
                 return "😐 Neutrales Sentiment"
                 
         elif analysis_type == "keywords":
-            # Einfache Keyword-Extraktion
-            words = text.lower().split()
-            word_freq = {}
-            for word in words:
-                if len(word) > 3:  # Nur längere Wörter
-                    word_freq[word] = word_freq.get(word, 0) + 1
-                    
-            top_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:5]
-            return f"🔑 Top Keywords: {', '.join([word for word, freq in top_words])}"
+            # Einfache Keyword-Extraktion (nur längere Wörter)
+            top_words = Counter(w for w in text.lower().split() if len(w) > 3).most_common(5)
+            return f"🔑 Top Keywords: {', '.join(word for word, _ in top_words)}"
             
         return f"📝 Text analysiert: {len(text)} Zeichen, {len(text.split())} Wörter"
         
     def get_capability_summary(self) -> str:
-        """Hole Zusammenfassung der Fähigkeiten"""
+        """Hole Zusammenfassung der Fähigkeiten (einmal gebaut, danach aus dem Cache)"""
+        if self._cap_summary is None:
+            self._cap_summary = self._build_capability_summary()
+        return self._cap_summary
+        
+    def _build_capability_summary(self) -> str:
+        """Baue die Zusammenfassung aus Tool-Verfügbarkeit und API-Key"""
         capabilities = []
         
         if self.available_tools["file_operations"]:
@@ -330,32 +829,21 @@ class AIAssistant:
     def process_complex_task(self, task: str, context: str = "") -> str:
         """Verarbeite komplexe Aufgabe mit allen verfügbaren Tools"""
         
-        # Prüfe ob KI-Fallback verwendet werden soll
-        if self.should_use_ai_fallback(task):
-            return self.process_with_ai(task, context)
-            
-        # Einfache lokale Verarbeitung
-        task_lower = task.lower()
-        
-        # Dateioperationen
-        if "datei" in task_lower or "file" in task_lower:
-            if "lesen" in task_lower or "read" in task_lower:
-                return "📁 Welche Datei soll ich lesen? Sage: 'Lies Datei [Pfad]'"
-            elif "schreiben" in task_lower or "write" in task_lower:
-                return "📝 Was soll ich schreiben? Sage: 'Schreibe in Datei [Pfad]: [Inhalt]'"
-                
-        # Code-Ausführung
-        elif "code" in task_lower or "programm" in task_lower:
-            return "💻 Welchen Code soll ich ausführen? Sage: 'Führe Code aus: [Code]'"
-            
-        # Text-Analyse
-        elif "analysier" in task_lower:
-            return "📝 Was soll ich analysieren? Sage: 'Analysiere Text: [Text]'"
-            
-        # Fähigkeiten anzeigen
-        elif "was kannst du" in task_lower or "fähigkeiten" in task_lower:
-            return self.get_capability_summary()
-            
-        # Fallback zu KI
-        else:
-            return self.process_with_ai(task, context) 
\ No newline at end of file
+        # Anfrage einmal vorbereiten, alle Schlüsselwörter in einem Durchlauf erkennen
+        task = Task.from_text(task)
+        categories = _scan_keywords(task.lower)
+        
+        # Handler direkt über die erkannte Route wählen, sonst Fallback zu KI
+        handler = _HANDLERS.get(_route_task(categories), AIAssistant.process_with_ai)
+        return handler(self, task, context)
+
+
+# Routen von process_complex_task -> Handler(self, task, context)
+_HANDLERS = {
+    "complex": AIAssistant.process_with_ai,
+    "file_read": lambda self, task, context: "📁 Welche Datei soll ich lesen? Sage: 'Lies Datei [Pfad]'",
+    "file_write": lambda self, task, context: "📝 Was soll ich schreiben? Sage: 'Schreibe in Datei [Pfad]: [Inhalt]'",
+    "code": lambda self, task, context: "💻 Welchen Code soll ich ausführen? Sage: 'Führe Code aus: [Code]'",
+    "analyze": lambda self, task, context: "📝 Was soll ich analysieren? Sage: 'Analysiere Text: [Text]'",
+    "capabilities": lambda self, task, context: self.get_capability_summary(),
+}
@@ -7,9 +7,11 @@ import threading
 import time
 import io
 import wave
+from pathlib import Path
 from typing import Optional, Tuple
 import asyncio
 from loguru import logger
+from io_pool import IO_EXECUTOR
 
 try:
     import pyaudio
@@ -19,6 +21,55 @@ except ImportError:
     AUDIO_AVAILABLE = False
     logger.warning("PyAudio not available, using mock audio recorder")
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if AUDIO_AVAILABLE and NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _ssq_i16(buf):
+        """Sum of squares of an int16 buffer, accumulated in int64 (compiled loop)"""
+        s = 0
+        for i in range(buf.shape[0]):
+            v = np.int64(buf[i])
+            s += v * v
+        return s
+        
+    @njit(cache=True)
+    def _any_loud(buf, threshold):
+        """True as soon as one sample reaches the threshold (early exit)"""
+        for i in range(buf.shape[0]):
+            v = np.int64(buf[i])
+            if v >= threshold or -v >= threshold:
+                return True
+        return False
+elif AUDIO_AVAILABLE:
+    def _ssq_i16(buf):
+        """Sum of squares of an int16 buffer, accumulated in int64"""
+        samples = buf.astype(np.int64)
+        return np.dot(samples, samples)
+        
+    def _any_loud(buf, threshold):
+        """True if any sample reaches the threshold"""
+        return bool((buf >= threshold).any() or (buf <= -threshold).any())
+
+if AUDIO_AVAILABLE:
+    def _is_silent(samples, threshold_peak, threshold_sq):
+        """RMS below the threshold, i.e. sum(x²) < threshold² * n"""
+        # No sample reaches the threshold, so the RMS can't either; otherwise check exactly
+        if not _any_loud(samples, threshold_peak):
+            return True
+        return int(_ssq_i16(samples)) < threshold_sq * samples.size
+        
+    def _warm_up_silence_check():
+        """Compile the njit kernels now instead of in the first PortAudio callback"""
+        # Read-only like the callback's np.frombuffer buffers (numba compiles per array type)
+        buf = np.frombuffer(bytes(64), dtype=np.int16)
+        _any_loud(buf, 1)
+        _ssq_i16(buf)
+
 
 class AudioRecorder:
     def __init__(self, 
@@ -38,10 +89,12 @@ class AudioRecorder:
         self.sample_rate = sample_rate
         self.channels = channels
         self.chunk_size = chunk_size
+        self._pcm_buf = bytearray()
         
         if AUDIO_AVAILABLE:
             self.pyaudio = pyaudio.PyAudio()
             self.format = format or pyaudio.paInt16
+            _warm_up_silence_check()
             self.is_recording = False
             logger.info("Audio recorder initialized with PyAudio")
         else:
@@ -72,7 +125,7 @@ class AudioRecorder:
         # Use thread pool for blocking I/O
         loop = asyncio.get_event_loop()
         audio_data = await loop.run_in_executor(
-            None, 
+            IO_EXECUTOR,
             self._record_sync,
             duration,
             silence_threshold,
@@ -81,14 +134,142 @@ class AudioRecorder:
         
         return audio_data
         
+    async def record_to_file(self,
+                             path,
+                             duration: float = 5.0,
+                             silence_threshold: float = 500,
+                             silence_duration: float = 1.5) -> Optional[Path]:
+        """
+        Record audio straight into a WAV file (constant memory for long recordings)
+        
+        Args:
+            path: Target WAV file
+            duration: Maximum recording duration
+            silence_threshold: RMS threshold for silence detection
+            silence_duration: Seconds of silence before auto-stop
+            
+        Returns:
+            Path of the written WAV file, or None if recording failed
+        """
+        if not AUDIO_AVAILABLE:
+            path = Path(path)
+            path.write_bytes(self._create_mock_audio())
+            return path
+            
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            IO_EXECUTOR,
+            self._record_to_file_sync,
+            Path(path),
+            duration,
+            silence_threshold,
+            silence_duration
+        )
+        
     def _record_sync(self, duration: float, silence_threshold: float, silence_duration: float) -> bytes:
         """Synchronous recording with silence detection"""
         if not self.pyaudio:
             return self._create_mock_audio()
             
+        # One contiguous PCM buffer, reused across recordings and only grown when needed
+        max_bytes = self._max_chunks(duration) * self._bytes_per_chunk()
+        if len(self._pcm_buf) < max_bytes:
+            self._pcm_buf = bytearray(max_bytes)
+        pcm = memoryview(self._pcm_buf)
+        nbytes = 0
+        
+        def write(data):
+            nonlocal nbytes
+            n = min(len(data), max_bytes - nbytes)
+            pcm[nbytes:nbytes + n] = data[:n]
+            nbytes += n
+            
+        if not self._capture(write, duration, silence_threshold, silence_duration):
+            return self._create_mock_audio()
+            
+        # Convert to WAV format
+        return self._frames_to_wav(self._pcm_buf, nbytes)
+        
+    def _record_to_file_sync(self, path: Path, duration: float,
+                             silence_threshold: float, silence_duration: float) -> Optional[Path]:
+        """Synchronous recording that streams each chunk into a WAV file"""
+        if not self.pyaudio:
+            path.write_bytes(self._create_mock_audio())
+            return path
+            
+        try:
+            with wave.open(str(path), 'wb') as wf:
+                wf.setnchannels(self.channels)
+                wf.setsampwidth(self.pyaudio.get_sample_size(self.format))
+                wf.setframerate(self.sample_rate)
+                if not self._capture(wf.writeframes, duration, silence_threshold, silence_duration):
+                    return None
+            return path
+            
+        except Exception as e:
+            logger.error(f"Recording to {path} failed: {e}")
+            return None
+            
+    def _max_chunks(self, duration: float) -> int:
+        return int(duration * self.sample_rate / self.chunk_size)
+        
+    def _bytes_per_chunk(self) -> int:
+        return self.chunk_size * self.pyaudio.get_sample_size(self.format) * self.channels
+        
+    def _capture(self, write, duration: float, silence_threshold: float, silence_duration: float) -> bool:
+        """Capture from the microphone into write() until silence or timeout
+        
+        Uses PyAudio's callback mode: PortAudio hands each buffer to on_audio on its
+        own thread, and this method just waits for the callback to signal completion.
+        """
         stream = None
-        frames = []
+        done = threading.Event()
         
+        chunks_per_second = self.sample_rate / self.chunk_size
+        silence_chunks_needed = int(silence_duration * chunks_per_second)
+        max_chunks = self._max_chunks(duration)
+        silent_chunks = 0
+        recorded_chunks = 0
+        
+        # Compare sum of squares against threshold² * n instead of taking a sqrt per chunk
+        threshold_sq = float(silence_threshold) * float(silence_threshold)
+        # Samples are integers, so |x| >= threshold  <=>  |x| >= ceil(threshold)
+        threshold_peak = int(np.ceil(silence_threshold))
+        frombuffer = np.frombuffer
+        int16 = np.int16
+        
+        def on_audio(in_data, frame_count, time_info, status):
+            nonlocal silent_chunks, recorded_chunks
+            try:
+                if not self.is_recording or recorded_chunks >= max_chunks:
+                    done.set()
+                    return (None, pyaudio.paComplete)
+                    
+                write(in_data)
+                recorded_chunks += 1
+                
+                # Silence detection on the chunk's RMS (peak pre-check in _is_silent)
+                silent = _is_silent(frombuffer(in_data, dtype=int16), threshold_peak, threshold_sq)
+                
+                if silent:
+                    silent_chunks += 1
+                    if silent_chunks >= silence_chunks_needed and recorded_chunks > chunks_per_second:
+                        logger.info("Silence detected, stopping recording")
+                        done.set()
+                        return (None, pyaudio.paComplete)
+                else:
+                    silent_chunks = 0
+                    
+                if recorded_chunks >= max_chunks:
+                    done.set()
+                    return (None, pyaudio.paComplete)
+                return (None, pyaudio.paContinue)
+                
+            except Exception as e:
+                logger.error(f"Error processing audio chunk: {e}")
+                done.set()
+                return (None, pyaudio.paComplete)
+                
         try:
             stream = self.pyaudio.open(
                 format=self.format,
@@ -96,50 +277,26 @@ class AudioRecorder:
                 rate=self.sample_rate,
                 input=True,
                 frames_per_buffer=self.chunk_size,
-                exception_on_overflow=False
+                stream_callback=on_audio,
+                start=False
             )
             
-            silent_chunks = 0
-            chunks_per_second = self.sample_rate / self.chunk_size
-            silence_chunks_needed = int(silence_duration * chunks_per_second)
-            max_chunks = int(duration * chunks_per_second)
-            
             self.is_recording = True
             start_time = time.time()
             
             logger.info("🎤 Recording... (speak now)")
+            stream.start_stream()
+            
+            # Safety margin in case the device stalls and the callback stops firing
+            done.wait(timeout=duration + 1.0)
             
-            for i in range(max_chunks):
-                if not self.is_recording:
-                    break
-                    
-                try:
-                    data = stream.read(self.chunk_size, exception_on_overflow=False)
-                    frames.append(data)
-                    
-                    # Calculate RMS for silence detection
-                    if AUDIO_AVAILABLE:
-                        audio_chunk = np.frombuffer(data, dtype=np.int16)
-                        rms = np.sqrt(np.mean(audio_chunk**2)) if len(audio_chunk) > 0 else 0
-                        
-                        if rms < silence_threshold:
-                            silent_chunks += 1
-                            if silent_chunks >= silence_chunks_needed and len(frames) > chunks_per_second:
-                                logger.info("Silence detected, stopping recording")
-                                break
-                        else:
-                            silent_chunks = 0
-                            
-                except Exception as e:
-                    logger.error(f"Error reading audio chunk: {e}")
-                    break
-                    
             recording_time = time.time() - start_time
             logger.info(f"Recording complete. Duration: {recording_time:.1f}s")
+            return True
             
         except Exception as e:
             logger.error(f"Audio recording failed: {e}")
-            return self._create_mock_audio()
+            return False
         finally:
             self.is_recording = False
             if stream:
@@ -149,12 +306,9 @@ class AudioRecorder:
                 except:
                     pass
             
-        # Convert to WAV format
-        return self._frames_to_wav(frames)
-        
-    def _frames_to_wav(self, frames: list) -> bytes:
-        """Convert audio frames to WAV format"""
-        if not frames:
+    def _frames_to_wav(self, buf: bytearray, nbytes: int) -> bytes:
+        """Convert the first nbytes of a PCM buffer to WAV format"""
+        if not nbytes:
             return self._create_mock_audio()
             
         wav_buffer = io.BytesIO()
@@ -167,7 +321,7 @@ class AudioRecorder:
                 else:
                     wf.setsampwidth(2)  # 16-bit
                 wf.setframerate(self.sample_rate)
-                wf.writeframes(b''.join(frames))
+                wf.writeframes(memoryview(buf)[:nbytes])
                 
             wav_buffer.seek(0)
             return wav_buffer.read()
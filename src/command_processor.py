@@ -3,20 +3,396 @@ THOR Agent - Enhanced Command Processor with Learning and Reflection
 Supports multiple personas and advanced reasoning with Phi-4 Mini
 """
 
-import whisper
 import anthropic
 import openai
 import requests
 import json
 import re
+import copy
+import bisect
 import os
 import io
+import wave
 import tempfile
-from typing import Optional, Dict, Any, List
+import contextlib
+import numpy as np
+from typing import Optional, Dict, Any, List, Tuple, Union
+from collections import OrderedDict
 import asyncio
 from mind.introspection_commands import MINDIntrospectionCommands
 from loguru import logger
 
+# Whisper models expect 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = 16000
+# Whisper decodes 30 s windows; longer utterances are transcribed on their own
+WHISPER_WINDOW_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+
+# Concurrent transcriptions are collected for up to STT_BATCH_WINDOW seconds
+# (at most STT_MAX_BATCH) and decoded as one Whisper batch
+STT_MAX_BATCH = 8
+STT_BATCH_WINDOW = 0.02
+
+# Routing buckets in priority order (first match wins), read from "<bucket>_patterns"
+ROUTING_PRECEDENCE = ("reflection", "personal", "coding", "creative", "simple")
+
+# Actions a processed command may carry
+VALID_ACTIONS = frozenset({
+    'copy', 'move', 'delete', 'list', 'create_folder', 'search',
+    'rename', 'compress', 'extract', 'organize', 'cleanup'
+})
+
+# JSON schema for OpenAI structured outputs (strict mode: every field required, nullable instead)
+COMMAND_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": sorted(VALID_ACTIONS)},
+        "source": {"type": "array", "items": {"type": "string"}},
+        "destination": {"type": ["string", "null"]},
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "filter": {"type": ["string", "null"]},
+                "recursive": {"type": ["boolean", "null"]}
+            },
+            "required": ["filter", "recursive"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["action", "source", "destination", "parameters"],
+    "additionalProperties": False
+}
+
+# Checks applied to every processed command (looser than COMMAND_SCHEMA: source may be a single string)
+COMMAND_VALIDATION_SCHEMA = {
+    "type": "object",
+    "required": ["action"],
+    "properties": {
+        "action": {"enum": sorted(VALID_ACTIONS)},
+        "source": {"type": ["array", "string", "null"]}
+    }
+}
+
+# Persona used for each routing type
+ROUTING_PERSONAS = {
+    'reflection': 'sparring_partner',
+    'personal': 'assistant',
+    'coding': 'coder',
+    'creative': 'sparring_partner',
+    'simple': 'organizer'
+}
+
+# Seconds between refreshes of the memory context appended to persona prompts
+MEMORY_CONTEXT_TTL = 30.0
+
+# Maximum in-flight requests per remote provider (Anthropic, OpenAI)
+PROVIDER_MAX_CONCURRENCY = 10
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    from faster_whisper import WhisperModel, BatchedInferencePipeline
+    from faster_whisper import __version__ as _faster_whisper_version
+    FASTER_WHISPER_AVAILABLE = True
+    # BatchedInferencePipeline reads clip_timestamps in seconds from 1.2 on, as sample indices before
+    FASTER_WHISPER_CLIPS_IN_SECONDS = tuple(int(p) for p in _faster_whisper_version.split(".")[:2]) >= (1, 2)
+except ImportError:
+    import whisper
+    FASTER_WHISPER_AVAILABLE = False
+    FASTER_WHISPER_CLIPS_IN_SECONDS = False
+
+try:
+    import fastjsonschema
+    FASTJSONSCHEMA_AVAILABLE = True
+except ImportError:
+    FASTJSONSCHEMA_AVAILABLE = False
+
+# Validator generated once from COMMAND_VALIDATION_SCHEMA
+_validate_command_schema = fastjsonschema.compile(COMMAND_VALIDATION_SCHEMA) if FASTJSONSCHEMA_AVAILABLE else None
+
+
+# Static instructions for Claude command extraction. Sent as a cached system block so
+# only the spoken command changes between requests.
+CLAUDE_COMMAND_PROMPT = """Du bist THOR, ein intelligenter Dateisystem-Assistent.
+Analysiere den deutschen Sprachbefehl des Benutzers und extrahiere die gewünschte Aktion.
+
+Antworte NUR mit einem validen JSON-Objekt im folgenden Format:
+{
+  "action": "copy|move|delete|list|create_folder|search|rename|compress|extract|organize|cleanup",
+  "source": ["datei1.txt", "datei2.txt"],
+  "destination": "/ziel/pfad/",
+  "parameters": {"filter": "*.pdf", "recursive": true}
+}
+
+Wichtige Regeln:
+- "source" ist immer ein Array, auch bei einer Datei
+- Bei "list" oder "search" ist source der Suchpfad
+- "destination" ist der Zielpfad
+- "parameters" für zusätzliche Optionen wie Filter
+- Erkenne deutsche Begriffe: kopiere=copy, verschiebe=move, lösche=delete, zeige/liste=list, erstelle=create_folder"""
+
+CLAUDE_COMMAND_SYSTEM = [
+    {"type": "text", "text": CLAUDE_COMMAND_PROMPT, "cache_control": {"type": "ephemeral"}}
+]
+
+# Phi-4 prompt templates per routing type ({text}, {system_prompt}); built once so the
+# prompt prefix is byte-identical across calls
+PHI4_PROMPT_REFLECTION = """<thinking>
+Ich bin THOR, ein lernender KI-Assistent. Der Benutzer möchte eine Reflexion oder Analyse.
+
+Befehl: "{text}"
+
+Lass mich das analysieren:
+1. Was genau wird von mir erwartet?
+2. Welche Erkenntnisse kann ich aus bisherigen Interaktionen ziehen?
+3. Wie kann ich dem Benutzer am besten helfen?
+4. Welche Handlungsempfehlungen kann ich geben?
+
+Systemkontext: {system_prompt}
+</thinking>
+
+{system_prompt}
+
+Benutzer: "{text}"
+
+Analysiere dies gründlich und gib eine durchdachte Antwort. Wenn es eine Dateioperation ist, antworte mit JSON.
+Ansonsten gib eine reflektierte, hilfreiche Antwort."""
+
+PHI4_PROMPT_CODING = """<thinking>
+Ich bin THOR, der Coding-Assistent. Der Benutzer braucht Hilfe beim Programmieren.
+
+Anfrage: "{text}"
+
+Lass mich analysieren:
+1. Handelt es sich um Code-Review, Debugging, oder neue Entwicklung?
+2. Welche Programmiersprache oder Technologie ist betroffen?
+3. Welche Best Practices sollte ich empfehlen?
+4. Wie kann ich den Code verbessern?
+
+Systemkontext: {system_prompt}
+</thinking>
+
+{system_prompt}
+
+Benutzer: "{text}"
+
+Analysiere die Coding-Anfrage und gib detaillierte, hilfreiche Antworten.
+Bei Dateisystem-Operationen verwende JSON-Format."""
+
+PHI4_PROMPT_PERSONAL = """<thinking>
+Ich bin THOR, der persönliche Assistent. Der Benutzer braucht Hilfe bei Organisation oder Aufgaben.
+
+Anfrage: "{text}"
+
+Lass mich analysieren:
+1. Welche spezifische Aufgabe soll ich erledigen?
+2. Welche Dateien oder Ordner sind betroffen?
+3. Wie kann ich die Aufgabe am effizientesten ausführen?
+4. Soll ich proaktive Verbesserungsvorschläge machen?
+
+Systemkontext: {system_prompt}
+</thinking>
+
+{system_prompt}
+
+Benutzer: "{text}"
+
+Extrahiere die gewünschte Aktion und führe sie aus.
+Für Dateisystem-Operationen antworte mit JSON:
+{{"action": "copy|move|delete|list|create_folder|organize|cleanup", "source": ["datei"], "destination": "/pfad/"}}"""
+
+PHI4_PROMPT_SIMPLE = """<thinking>
+Einfache Dateisystem-Operation erkannt.
+
+Befehl: "{text}"
+
+Analyse:
+1. Welche Aktion? (kopiere=copy, verschiebe=move, lösche=delete, zeige=list, erstelle=create_folder)
+2. Welche Dateien? (source)
+3. Wohin? (destination)
+4. Parameter oder Filter?
+</thinking>
+
+Extrahiere aus diesem deutschen Befehl die Dateisystem-Aktion:
+
+Befehl: "{text}"
+
+Antworte NUR mit validem JSON:
+{{"action": "copy|move|delete|list|create_folder", "source": ["datei"], "destination": "/pfad/"}}"""
+
+PHI4_PROMPTS = {
+    'reflection': PHI4_PROMPT_REFLECTION,
+    'coding': PHI4_PROMPT_CODING,
+    'personal': PHI4_PROMPT_PERSONAL,
+}
+
+# Characters that matter when locating a JSON object in free text
+_JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+
+def _json_loads(data):
+    """Parse JSON (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _parse_json_reply(content: str) -> Optional[Dict]:
+    """
+    Parse a JSON object from an LLM reply
+    
+    Tries the whole reply first, then the first balanced {...} block, so prose
+    and ```json fences around the object are skipped in one linear scan.
+    """
+    try:
+        result = _json_loads(content)
+        return result if isinstance(result, dict) else None
+    except ValueError:
+        pass
+        
+    start = content.find("{")
+    if start < 0:
+        return None
+        
+    depth = 0
+    in_string = False
+    escaped_pos = -1
+    for match in _JSON_STRUCTURE_RE.finditer(content, start):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        char = match.group()
+        if char == "\\":
+            escaped_pos = pos + 1
+        elif char == '"':
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == "{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                try:
+                    result = _json_loads(content[start:pos + 1])
+                except ValueError:
+                    return None
+                return result if isinstance(result, dict) else None
+    return None
+
+
+def _without_nulls(command: Dict) -> Dict:
+    """Drop null fields (structured outputs fill unused optional fields with null)"""
+    return {
+        key: _without_nulls(value) if isinstance(value, dict) else value
+        for key, value in command.items() if value is not None
+    }
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _pcm16_to_float32(pcm, channels):
+        """Interleaved int16 PCM -> mono float32 in [-1, 1], scaled and downmixed in one pass"""
+        frames = pcm.shape[0] // channels
+        out = np.empty(frames, np.float32)
+        scale = np.float32(1.0 / (32768.0 * channels))
+        if channels == 1:
+            # Separate mono loop so it vectorizes
+            for i in range(frames):
+                out[i] = pcm[i] * scale
+            return out
+        for i in range(frames):
+            acc = np.float32(0.0)
+            for c in range(channels):
+                acc += np.float32(pcm[i * channels + c])
+            out[i] = acc * scale
+        return out
+else:
+    def _pcm16_to_float32(pcm, channels):
+        """Interleaved int16 PCM -> mono float32 in [-1, 1]"""
+        samples = pcm.astype(np.float32)
+        samples *= 1.0 / 32768.0
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples
+
+
+def _pcm_to_float32(audio_data: bytes) -> np.ndarray:
+    """Decode WAV (or raw 16 kHz int16 PCM) bytes to a 16 kHz mono float32 array"""
+    sample_rate, channels = WHISPER_SAMPLE_RATE, 1
+    if audio_data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(audio_data)) as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"Unsupported sample width: {wav.getsampwidth()} bytes")
+            sample_rate, channels = wav.getframerate(), wav.getnchannels()
+            audio_data = wav.readframes(wav.getnframes())
+            
+    samples = _pcm16_to_float32(np.frombuffer(audio_data, dtype=np.int16), channels)
+    if sample_rate != WHISPER_SAMPLE_RATE and samples.size:
+        # Linear resampling is enough for speech recognition
+        target = np.arange(0, samples.size * WHISPER_SAMPLE_RATE // sample_rate) * (sample_rate / WHISPER_SAMPLE_RATE)
+        samples = np.interp(target, np.arange(samples.size), samples).astype(np.float32)
+    return samples
+
+
+@contextlib.contextmanager
+def _audio_file(audio_data: bytes):
+    """
+    Expose encoded audio as a file path for Whisper's decoder
+    
+    Uses an anonymous in-memory file on Linux (no disk writeback); elsewhere a
+    temporary file that is always removed, also when transcription fails.
+    """
+    if hasattr(os, "memfd_create"):
+        fd = os.memfd_create("thor-stt", os.MFD_CLOEXEC)
+        try:
+            os.write(fd, audio_data)
+            # /proc/<pid> rather than /proc/self so an ffmpeg child process can open it too
+            yield f"/proc/{os.getpid()}/fd/{fd}"
+        finally:
+            os.close(fd)
+    else:
+        temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
+        try:
+            with temp_file:
+                temp_file.write(audio_data)
+            yield temp_file.name
+        finally:
+            os.unlink(temp_file.name)
+
+
+def _quantize_whisper_cpu(model):
+    """Apply dynamic int8 quantization to the Linear layers of an openai-whisper model"""
+    import torch
+    
+    # whisper.model.Linear only adds a dtype cast (a no-op in fp32), but quantize_dynamic
+    # only swaps exact nn.Linear instances
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
 
 class EnhancedCommandProcessor:
     def __init__(self, llm_config: dict, memory_manager=None, mind_system=None):
@@ -30,17 +406,57 @@ class EnhancedCommandProcessor:
         self.fallback_config = llm_config.get('providers', {}).get('fallback', {})
         self.routing_config = llm_config['routing']
         self.personas = llm_config.get('personas', {})
+        self._persona_prompts = {
+            persona: persona_config.get('prompt', '')
+            for persona, persona_config in self.personas.items()
+        }
+        self._build_router()
+        
+        # Memory context for system prompts, refreshed in the background every MEMORY_CONTEXT_TTL
+        self._memory_suffix = ""
+        self._memory_refresh_task = None
+        
+        # Strong references to fire-and-forget persistence tasks so they are not garbage collected
+        self._bg_tasks = set()
+        
+        # Limits concurrent provider requests when racing Phi-4 against Claude
+        self._llm_semaphore = asyncio.Semaphore(self.routing_config.get('max_concurrent_requests', 4))
+        
+        # LRU cache of validated results keyed by (routing type, normalized text)
+        self._cmd_cache = OrderedDict()
+        self._cmd_cache_size = self.routing_config.get('command_cache_size', 512)
         
         # Initialize Whisper for STT
+        self._whisper_fp16 = False
         try:
             model_size = llm_config.get('whisper_model', 'base')
-            logger.info(f"Loading Whisper model: {model_size}")
-            self.whisper_model = whisper.load_model(model_size)
+            if FASTER_WHISPER_AVAILABLE:
+                # A model exported once with ct2-transformers-converter --quantization int8
+                # is loaded as-is instead of being downloaded and quantized on every start
+                model_dir = llm_config.get('whisper_model_dir')
+                if model_dir and os.path.isdir(model_dir):
+                    model_size = model_dir
+                # CTranslate2 backend with int8 weights: much faster than openai-whisper on CPU
+                compute_type = llm_config.get('whisper_compute_type', 'int8')
+                logger.info(f"Loading faster-whisper model: {model_size} ({compute_type})")
+                self.whisper_model = WhisperModel(model_size, device="auto", compute_type=compute_type)
+                self._batched_whisper = BatchedInferencePipeline(model=self.whisper_model)
+            else:
+                logger.info(f"Loading Whisper model: {model_size}")
+                self.whisper_model = whisper.load_model(model_size)
+                # fp16 on CUDA; on CPU quantize the Linear layers to int8 instead
+                self._whisper_fp16 = self.whisper_model.device.type == "cuda"
+                if not self._whisper_fp16 and llm_config.get('whisper_int8', True):
+                    self.whisper_model = _quantize_whisper_cpu(self.whisper_model)
             logger.info("Whisper model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load Whisper: {e}")
             self.whisper_model = None
             
+        # Transcription micro-batcher (queue and worker start with the first request)
+        self._stt_queue = None
+        self._stt_worker_task = None
+        
         # Initialize LLM clients
         self._init_llm_clients()
         
@@ -54,11 +470,17 @@ class EnhancedCommandProcessor:
         
     def _init_llm_clients(self):
         """Initialize all LLM clients"""
+        # Persistent client for the local Phi-4 endpoint: connections are kept alive
+        if HTTPX_AVAILABLE:
+            self._http = httpx.AsyncClient(base_url=self.local_config['endpoint'], timeout=15.0)
+        else:
+            self._http = requests.Session()
+            
         # Anthropic client
         try:
             api_key = os.getenv('ANTHROPIC_API_KEY')
             if api_key:
-                self.anthropic_client = anthropic.Anthropic(api_key=api_key)
+                self.anthropic_client = anthropic.AsyncAnthropic(api_key=api_key)
                 logger.info("Anthropic client initialized")
             else:
                 self.anthropic_client = None
@@ -70,7 +492,7 @@ class EnhancedCommandProcessor:
         try:
             api_key = os.getenv('OPENAI_API_KEY')
             if api_key:
-                self.openai_client = openai.OpenAI(api_key=api_key)
+                self.openai_client = openai.AsyncOpenAI(api_key=api_key)
                 logger.info("OpenAI client initialized")
             else:
                 self.openai_client = None
@@ -78,6 +500,10 @@ class EnhancedCommandProcessor:
             logger.error(f"Failed to initialize OpenAI client: {e}")
             self.openai_client = None
             
+        # Per-provider caps on concurrent requests (rate-limit protection)
+        self._anthropic_semaphore = asyncio.Semaphore(PROVIDER_MAX_CONCURRENCY)
+        self._openai_semaphore = asyncio.Semaphore(PROVIDER_MAX_CONCURRENCY)
+            
     def _audio_to_text(self, audio_data: bytes) -> str:
         """Convert audio bytes to text using Whisper"""
         if not self.whisper_model:
@@ -85,77 +511,246 @@ class EnhancedCommandProcessor:
             return ""
             
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
+            # Decode in-process instead of writing a temp file for ffmpeg to read back
+            audio = _pcm_to_float32(audio_data)
+        except (ValueError, EOFError, wave.Error):
+            return self._transcribe_encoded(audio_data)
+            
+        try:
+            return self._transcribe_batch([audio])[0]
+        except Exception as e:
+            logger.error(f"STT transcription failed: {e}")
+            return ""
+            
+    async def _transcribe(self, audio_data: bytes) -> str:
+        """Queue audio for the transcription micro-batcher and wait for its text"""
+        if not self.whisper_model:
+            logger.error("Whisper model not available")
+            return ""
+            
+        try:
+            audio = _pcm_to_float32(audio_data)
+        except (ValueError, EOFError, wave.Error):
+            # Not 16-bit PCM: let Whisper's own decoder handle it, outside the batch
+            return await asyncio.to_thread(self._transcribe_encoded, audio_data)
+            
+        if self._stt_queue is None:
+            self._stt_queue = asyncio.Queue()
+            self._stt_worker_task = asyncio.create_task(self._stt_worker())
+            
+        future = asyncio.get_running_loop().create_future()
+        await self._stt_queue.put((audio, future))
+        return await future
+        
+    async def _stt_worker(self):
+        """Collect concurrent transcription requests and decode them as one batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._stt_queue.get()]
+            deadline = loop.time() + STT_BATCH_WINDOW
+            while len(batch) < STT_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._stt_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                    
+            try:
+                texts = await asyncio.to_thread(self._transcribe_batch, [audio for audio, _ in batch])
+            except Exception as e:
+                logger.error(f"STT transcription failed: {e}")
+                texts = [""] * len(batch)
                 
+            for (_, future), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+                    
+    def _transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """Transcribe several 16 kHz float32 utterances, batching the Whisper decode"""
+        texts = [""] * len(audios)
+        batch = [i for i, audio in enumerate(audios) if 0 < audio.size <= WHISPER_WINDOW_SAMPLES]
+        single = [i for i, audio in enumerate(audios) if audio.size > WHISPER_WINDOW_SAMPLES]
+        if len(batch) == 1:
+            single += batch
+            batch = []
+            
+        if batch:
+            logger.info(f"Transcribing {len(batch)} utterances in one Whisper batch...")
+            if FASTER_WHISPER_AVAILABLE:
+                batch_texts = self._transcribe_batch_faster([audios[i] for i in batch])
+            else:
+                batch_texts = self._transcribe_batch_openai([audios[i] for i in batch])
+            for i, text in zip(batch, batch_texts):
+                texts[i] = text
+                
+        for i in single:
             logger.info("Transcribing audio with Whisper...")
-            result = self.whisper_model.transcribe(
-                temp_file_path,
-                language='de',
-                fp16=False
-            )
+            texts[i] = self._transcribe_one(audios[i])
             
-            text = result['text'].strip()
+        for text in texts:
+            logger.info(f"Transcription: '{text}'")
+        return texts
+        
+    def _transcribe_encoded(self, audio_data: bytes) -> str:
+        """Transcribe audio that cannot be decoded in-process (e.g. non-16-bit WAV)"""
+        try:
+            with _audio_file(audio_data) as path:
+                logger.info("Transcribing audio with Whisper...")
+                text = self._transcribe_one(path)
             logger.info(f"Transcription: '{text}'")
-            
-            os.unlink(temp_file_path)
             return text
-            
         except Exception as e:
             logger.error(f"STT transcription failed: {e}")
             return ""
             
+    def _transcribe_one(self, audio: Union[np.ndarray, str]) -> str:
+        """Transcribe a single utterance (samples or a file path)"""
+        if FASTER_WHISPER_AVAILABLE:
+            segments, _ = self.whisper_model.transcribe(
+                audio,
+                language='de',
+                beam_size=1,
+                vad_filter=True
+            )
+            # segments is lazy: decoding happens while joining
+            return "".join(segment.text for segment in segments).strip()
+            
+        result = self.whisper_model.transcribe(
+            audio,
+            language='de',
+            fp16=self._whisper_fp16
+        )
+        return result['text'].strip()
+        
+    def _transcribe_batch_faster(self, audios: List[np.ndarray]) -> List[str]:
+        """Decode utterances (each <= 30 s) as clips of one audio in faster-whisper's batched pipeline"""
+        # Every utterance gets its own zero-padded 30 s slot (Whisper pads to 30 s anyway).
+        # From 1.2 on the pipeline merges consecutive clips into windows of up to 30 s;
+        # full-length clips keep each utterance in a decode window of its own.
+        slotted = np.zeros(len(audios) * WHISPER_WINDOW_SAMPLES, dtype=np.float32)
+        clips = []
+        for i, audio in enumerate(audios):
+            start = i * WHISPER_WINDOW_SAMPLES
+            slotted[start:start + audio.size] = audio
+            clips.append({"start": start, "end": start + WHISPER_WINDOW_SAMPLES})
+        if FASTER_WHISPER_CLIPS_IN_SECONDS:
+            clips = [{"start": clip["start"] / WHISPER_SAMPLE_RATE, "end": clip["end"] / WHISPER_SAMPLE_RATE}
+                     for clip in clips]
+            
+        segments, _ = self._batched_whisper.transcribe(
+            slotted,
+            language='de',
+            beam_size=1,
+            clip_timestamps=clips,
+            batch_size=len(audios)
+        )
+        
+        # Segment start times (seconds) are offsets into the slotted audio: map back by slot
+        slot_starts = [i * WHISPER_WINDOW_SAMPLES / WHISPER_SAMPLE_RATE for i in range(len(audios))]
+        parts = [[] for _ in audios]
+        for segment in segments:
+            parts[bisect.bisect_right(slot_starts, segment.start + 1e-3) - 1].append(segment.text)
+        return ["".join(texts).strip() for texts in parts]
+        
+    def _transcribe_batch_openai(self, audios: List[np.ndarray]) -> List[str]:
+        """Decode utterances (each <= 30 s) as one padded mel batch with openai-whisper"""
+        import torch
+        
+        model = self.whisper_model
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels)
+            for audio in audios
+        ]).to(model.device)
+        results = whisper.decode(model, mels, whisper.DecodingOptions(language='de', fp16=self._whisper_fp16))
+        return [result.text.strip() for result in results]
+        
+    def _build_router(self):
+        """Compile all routing patterns once so routing is a single scan per utterance"""
+        buckets = [
+            (bucket, self.routing_config.get(f'{bucket}_patterns', []))
+            for bucket in ROUTING_PRECEDENCE
+        ]
+        
+        if AHOCORASICK_AVAILABLE:
+            # One automaton for all buckets; value = best (lowest) rank of the pattern
+            self._routing_automaton = ahocorasick.Automaton()
+            ranks = {}
+            for rank, (_, patterns) in enumerate(buckets):
+                for pattern in patterns:
+                    ranks.setdefault(pattern, rank)
+            for pattern, rank in ranks.items():
+                self._routing_automaton.add_word(pattern, rank)
+            if ranks:
+                self._routing_automaton.make_automaton()
+            else:
+                self._routing_automaton = None
+        else:
+            # One alternation regex per bucket, checked in priority order
+            self._routing_res = [
+                (bucket, re.compile("|".join(map(re.escape, patterns))))
+                for bucket, patterns in buckets if patterns
+            ]
+            
     def _determine_routing(self, text: str) -> str:
         """Determine which LLM to route to based on advanced patterns"""
         text_lower = text.lower()
         
-        # Check for reflection/learning patterns
-        if any(pattern in text_lower for pattern in self.routing_config.get('reflection_patterns', [])):
-            return 'reflection'
-            
-        # Check for personal assistance patterns  
-        if any(pattern in text_lower for pattern in self.routing_config.get('personal_patterns', [])):
-            return 'personal'
-            
-        # Check for coding patterns
-        if any(pattern in text_lower for pattern in self.routing_config.get('coding_patterns', [])):
-            return 'coding'
-            
-        # Check for creative patterns
-        if any(pattern in text_lower for pattern in self.routing_config.get('creative_patterns', [])):
-            return 'creative'
-            
-        # Check for simple file operations
-        if any(pattern in text_lower for pattern in self.routing_config.get('simple_patterns', [])):
-            return 'simple'
-            
+        if AHOCORASICK_AVAILABLE:
+            best = None
+            if self._routing_automaton is not None:
+                for _, rank in self._routing_automaton.iter(text_lower):
+                    if best is None or rank < best:
+                        best = rank
+                        if rank == 0:
+                            break
+            if best is not None:
+                return ROUTING_PRECEDENCE[best]
+        else:
+            for bucket, pattern_re in self._routing_res:
+                if pattern_re.search(text_lower):
+                    return bucket
+                    
         # Default to personal assistance
         return 'personal'
         
-    async def _get_persona_context(self, routing_type: str) -> tuple[str, str]:
+    def _get_persona_context(self, routing_type: str) -> tuple[str, str]:
         """Get persona and system prompt based on routing"""
-        persona_mapping = {
-            'reflection': 'sparring_partner',
-            'personal': 'assistant', 
-            'coding': 'coder',
-            'creative': 'sparring_partner',
-            'simple': 'organizer'
-        }
-        
-        persona = persona_mapping.get(routing_type, 'assistant')
+        persona = ROUTING_PERSONAS.get(routing_type, 'assistant')
         self.current_persona = persona
         
-        persona_config = self.personas.get(persona, {})
-        system_prompt = persona_config.get('prompt', '')
+        # Memory context comes from the background refresh, not a lookup per request
+        return persona, self._persona_prompts.get(persona, '') + self._memory_suffix
         
-        # Add memory context if available
-        if self.memory:
-            memory_context = await self.memory.get_learning_context("")
-            if memory_context:
-                system_prompt += f"\n\nKontext aus früheren Interaktionen:\n{memory_context}"
-                
-        return persona, system_prompt
+    def _start_memory_refresh(self):
+        """Start the background refresh of the memory context (once, inside the event loop)"""
+        if self.memory and self._memory_refresh_task is None:
+            self._memory_refresh_task = asyncio.create_task(self._memory_refresh_loop())
+            
+    def _spawn_background(self, coro):
+        """Run a persistence coroutine without awaiting it, logging any failure"""
+        task = asyncio.create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._background_done)
+        
+    def _background_done(self, task: asyncio.Task):
+        """Drop a finished background task and log its exception, if any"""
+        self._bg_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background persistence failed: {task.exception()}")
+            
+    async def _memory_refresh_loop(self):
+        """Fetch the learning context from memory every MEMORY_CONTEXT_TTL seconds"""
+        while True:
+            try:
+                memory_context = await self.memory.get_learning_context("")
+                self._memory_suffix = (
+                    f"\n\nKontext aus früheren Interaktionen:\n{memory_context}" if memory_context else ""
+                )
+            except Exception as e:
+                logger.error(f"Failed to refresh memory context: {e}")
+            await asyncio.sleep(MEMORY_CONTEXT_TTL)
         
     async def _process_with_phi4_reasoning(self, text: str, routing_type: str) -> Optional[Dict]:
         """Process with Phi-4 Mini Reasoning using advanced prompting"""
@@ -163,96 +758,12 @@ class EnhancedCommandProcessor:
             endpoint = self.local_config['endpoint']
             model = self.local_config['model']
             
-            persona, system_prompt = await self._get_persona_context(routing_type)
-            
-            # Enhanced prompt with reasoning steps for Phi-4 Mini
-            if routing_type == 'reflection':
-                prompt = f"""<thinking>
-Ich bin THOR, ein lernender KI-Assistent. Der Benutzer möchte eine Reflexion oder Analyse.
-
-Befehl: "{text}"
-
-Lass mich das analysieren:
-1. Was genau wird von mir erwartet?
-2. Welche Erkenntnisse kann ich aus bisherigen Interaktionen ziehen?
-3. Wie kann ich dem Benutzer am besten helfen?
-4. Welche Handlungsempfehlungen kann ich geben?
-
-Systemkontext: {system_prompt}
-</thinking>
-
-{system_prompt}
-
-Benutzer: "{text}"
-
-Analysiere dies gründlich und gib eine durchdachte Antwort. Wenn es eine Dateioperation ist, antworte mit JSON.
-Ansonsten gib eine reflektierte, hilfreiche Antwort."""
-            
-            elif routing_type == 'coding':
-                prompt = f"""<thinking>
-Ich bin THOR, der Coding-Assistent. Der Benutzer braucht Hilfe beim Programmieren.
-
-Anfrage: "{text}"
-
-Lass mich analysieren:
-1. Handelt es sich um Code-Review, Debugging, oder neue Entwicklung?
-2. Welche Programmiersprache oder Technologie ist betroffen?
-3. Welche Best Practices sollte ich empfehlen?
-4. Wie kann ich den Code verbessern?
-
-Systemkontext: {system_prompt}
-</thinking>
-
-{system_prompt}
-
-Benutzer: "{text}"
-
-Analysiere die Coding-Anfrage und gib detaillierte, hilfreiche Antworten.
-Bei Dateisystem-Operationen verwende JSON-Format."""
+            persona, system_prompt = self._get_persona_context(routing_type)
             
-            elif routing_type == 'personal':
-                prompt = f"""<thinking>
-Ich bin THOR, der persönliche Assistent. Der Benutzer braucht Hilfe bei Organisation oder Aufgaben.
-
-Anfrage: "{text}"
-
-Lass mich analysieren:
-1. Welche spezifische Aufgabe soll ich erledigen?
-2. Welche Dateien oder Ordner sind betroffen?
-3. Wie kann ich die Aufgabe am effizientesten ausführen?
-4. Soll ich proaktive Verbesserungsvorschläge machen?
-
-Systemkontext: {system_prompt}
-</thinking>
-
-{system_prompt}
-
-Benutzer: "{text}"
-
-Extrahiere die gewünschte Aktion und führe sie aus.
-Für Dateisystem-Operationen antworte mit JSON:
-{{"action": "copy|move|delete|list|create_folder|organize|cleanup", "source": ["datei"], "destination": "/pfad/"}}"""
+            # Enhanced prompt with reasoning steps for Phi-4 Mini (simple template for other routes)
+            template = PHI4_PROMPTS.get(routing_type, PHI4_PROMPT_SIMPLE)
+            prompt = template.format(text=text, system_prompt=system_prompt)
             
-            else:  # simple operations
-                prompt = f"""<thinking>
-Einfache Dateisystem-Operation erkannt.
-
-Befehl: "{text}"
-
-Analyse:
-1. Welche Aktion? (kopiere=copy, verschiebe=move, lösche=delete, zeige=list, erstelle=create_folder)
-2. Welche Dateien? (source)
-3. Wohin? (destination)
-4. Parameter oder Filter?
-</thinking>
-
-Extrahiere aus diesem deutschen Befehl die Dateisystem-Aktion:
-
-Befehl: "{text}"
-
-Antworte NUR mit validem JSON:
-{{"action": "copy|move|delete|list|create_folder", "source": ["datei"], "destination": "/pfad/"}}"""
-
             payload = {
                 "model": model,
                 "messages": [
@@ -263,15 +774,29 @@ Antworte NUR mit validem JSON:
                 "max_tokens": self.local_config.get('max_tokens', 1000)
             }
             
+            # Simple commands only need a short JSON object. The reasoning model writes its analysis
+            # first, so a stop sequence would cut the reply before the JSON: constrain the answer to
+            # COMMAND_SCHEMA via the server's structured output and keep a cap with room to reason
+            if routing_type == 'simple':
+                payload["max_tokens"] = self.local_config.get('simple_max_tokens', 512)
+                if self.local_config.get('simple_structured_output', True):
+                    payload["response_format"] = {
+                        "type": "json_schema",
+                        "json_schema": {"name": "thor_command", "schema": COMMAND_SCHEMA, "strict": True}
+                    }
+            
             logger.info(f"Sending request to Phi-4 ({routing_type}): {endpoint}")
             
-            async with asyncio.timeout(15):  # 15 second timeout
-                response = await asyncio.to_thread(
-                    requests.post,
-                    f"{endpoint}/chat/completions",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
+            if HTTPX_AVAILABLE:
+                response = await self._http.post("/chat/completions", json=payload)
+            else:
+                async with asyncio.timeout(15):  # 15 second timeout
+                    response = await asyncio.to_thread(
+                        self._http.post,
+                        f"{endpoint}/chat/completions",
+                        json=payload,
+                        timeout=15
+                    )
                 
             if response.status_code == 200:
                 result = response.json()
@@ -279,20 +804,12 @@ Antworte NUR mit validem JSON:
                 
                 # For simple operations, try to parse JSON
                 if routing_type == 'simple':
-                    try:
-                        command = json.loads(content)
-                        logger.info(f"Phi-4 JSON response: {command}")
-                        return command
-                    except json.JSONDecodeError:
-                        # Extract JSON from response if wrapped in text
-                        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                        if json_match:
-                            command = json.loads(json_match.group())
-                            logger.info(f"Extracted JSON from Phi-4: {command}")
-                            return command
-                        else:
-                            logger.error(f"Invalid JSON from Phi-4: {content}")
-                            return None
+                    command = _parse_json_reply(content)
+                    if command is None:
+                        logger.error(f"Invalid JSON from Phi-4: {content}")
+                        return None
+                    logger.info(f"Phi-4 JSON response: {command}")
+                    return command
                 else:
                     # For other types, return as text response
                     logger.info(f"Phi-4 text response ({routing_type}): {content[:100]}...")
@@ -312,61 +829,29 @@ Antworte NUR mit validem JSON:
             return None
             
         try:
-            prompt = f"""Du bist THOR, ein intelligenter Dateisystem-Assistent.
-Analysiere diesen deutschen Sprachbefehl und extrahiere die gewünschte Aktion.
-
-Befehl: "{text}"
-
-Antworte NUR mit einem validen JSON-Objekt im folgenden Format:
-{{
-  "action": "copy|move|delete|list|create_folder|search|rename|compress|extract|organize|cleanup",
-  "source": ["datei1.txt", "datei2.txt"],
-  "destination": "/ziel/pfad/",
-  "parameters": {{"filter": "*.pdf", "recursive": true}}
-}}
-
-Wichtige Regeln:
-- "source" ist immer ein Array, auch bei einer Datei
-- Bei "list" oder "search" ist source der Suchpfad
-- "destination" ist der Zielpfad
-- "parameters" für zusätzliche Optionen wie Filter
-- Erkenne deutsche Begriffe: kopiere=copy, verschiebe=move, lösche=delete, zeige/liste=list, erstelle=create_folder"""
-
             logger.info("Sending request to Claude...")
             
-            message = await asyncio.to_thread(
-                self.anthropic_client.messages.create,
-                model=self.remote_config['model'],
-                max_tokens=self.remote_config.get('max_tokens', 500),
-                temperature=self.remote_config.get('temperature', 0.3),
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            async with self._anthropic_semaphore:
+                message = await self.anthropic_client.messages.create(
+                    model=self.remote_config['model'],
+                    max_tokens=self.remote_config.get('max_tokens', 500),
+                    temperature=self.remote_config.get('temperature', 0.3),
+                    system=CLAUDE_COMMAND_SYSTEM,
+                    messages=[
+                        {"role": "user", "content": f'Befehl: "{text}"'}
+                    ]
+                )
             
             content = message.content[0].text.strip()
             logger.info(f"Claude response: {content}")
             
-            # Parse JSON response
-            try:
-                content = re.sub(r'```json\s*|\s*```', '', content)
-                command = json.loads(content)
-                logger.info(f"Parsed command from Claude: {command}")
-                return command
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON from Claude: {content}")
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    try:
-                        command = json.loads(json_match.group())
-                        logger.info(f"Extracted JSON from Claude: {command}")
-                        return command
-                    except json.JSONDecodeError:
-                        pass
-                        
+            # Parse JSON response (code fences and surrounding text are skipped)
+            command = _parse_json_reply(content)
+            if command is None:
                 logger.error("Could not parse command from Claude response")
                 return None
+            logger.info(f"Parsed command from Claude: {command}")
+            return command
                 
         except Exception as e:
             logger.error(f"Claude processing failed: {e}")
@@ -380,21 +865,8 @@ Wichtige Regeln:
             
         try:
             logger.info("Using OpenAI as fallback...")
-            
-            response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
-                model=self.fallback_config.get('model', 'gpt-4-turbo-preview'),
-                messages=[
-                    {"role": "system", "content": "Du bist THOR, ein Dateisystem-Assistent. Antworte nur mit JSON."},
-                    {"role": "user", "content": f'Extrahiere Dateisystem-Befehl aus: "{text}" als JSON'}
-                ],
-                temperature=self.fallback_config.get('temperature', 0.3),
-                max_tokens=self.fallback_config.get('max_tokens', 500),
-                response_format={"type": "json_object"}
-            )
-            
-            content = response.choices[0].message.content
-            command = json.loads(content)
+            async with self._openai_semaphore:
+                command = await self._stream_openai_command(text)
             logger.info(f"OpenAI fallback response: {command}")
             return command
             
@@ -402,14 +874,97 @@ Wichtige Regeln:
             logger.error(f"OpenAI fallback failed: {e}")
             return None
             
+    async def _stream_openai_command(self, text: str) -> Optional[Dict]:
+        """Stream the OpenAI reply and stop as soon as the JSON object is complete"""
+        model = self.fallback_config.get('model', 'gpt-4o-mini')
+        # Structured outputs need gpt-4o or newer; older models get plain JSON mode
+        if self.fallback_config.get('structured_outputs', not model.startswith(('gpt-3.5', 'gpt-4-'))):
+            response_format = {
+                "type": "json_schema",
+                "json_schema": {"name": "thor_command", "schema": COMMAND_SCHEMA, "strict": True}
+            }
+        else:
+            response_format = {"type": "json_object"}
+            
+        stream = await self.openai_client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "Du bist THOR, ein Dateisystem-Assistent. Antworte nur mit JSON."},
+                {"role": "user", "content": f'Extrahiere Dateisystem-Befehl aus: "{text}" als JSON'}
+            ],
+            temperature=self.fallback_config.get('temperature', 0.3),
+            max_tokens=self.fallback_config.get('max_tokens', 500),
+            response_format=response_format,
+            stream=True
+        )
+        
+        parts = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                if "}" in delta:
+                    command = _parse_json_reply("".join(parts))
+                    if command is not None:
+                        return _without_nulls(command)
+        finally:
+            await stream.close()
+            
+        command = _parse_json_reply("".join(parts))
+        return _without_nulls(command) if command is not None else None
+        
+    def _get_cached_command(self, key: Tuple[str, str]) -> Optional[Dict]:
+        """Return a copy of a cached command and mark it as recently used"""
+        command = self._cmd_cache.get(key)
+        if command is None:
+            return None
+        self._cmd_cache.move_to_end(key)
+        return copy.deepcopy(command)
+        
+    def _cache_command(self, key: Tuple[str, str], command: Dict):
+        """Remember a validated command, evicting the least recently used one"""
+        # Free-text replies depend on the conversation and memory context: only actions are reused
+        if self._cmd_cache_size <= 0 or command.get('type') == 'text_response':
+            return
+        self._cmd_cache[key] = copy.deepcopy(command)
+        self._cmd_cache.move_to_end(key)
+        if len(self._cmd_cache) > self._cmd_cache_size:
+            self._cmd_cache.popitem(last=False)
+            
+    async def _race_providers(self, *coros) -> Optional[Dict]:
+        """Run providers concurrently, return the first valid command and cancel the rest"""
+        async def limited(coro):
+            async with self._llm_semaphore:
+                return await coro
+                
+        pending = {asyncio.create_task(limited(coro)) for coro in coros}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = None if task.exception() else task.result()
+                    if result and self._validate_command(result):
+                        return result
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+                
     async def process(self, audio_data: bytes) -> Optional[Dict]:
         """
         Main processing pipeline with enhanced routing, learning and MIND consciousness
         """
         try:
+            # Memory context is fetched in the background while speech is transcribed
+            self._start_memory_refresh()
+            
             # Step 1: Speech to Text
             logger.info("Starting enhanced command processing pipeline...")
-            text = self._audio_to_text(audio_data)
+            text = await self._transcribe(audio_data)
             
             if not text:
                 logger.warning("No text extracted from audio")
@@ -430,11 +985,23 @@ Wichtige Regeln:
             routing_type = self._determine_routing(text)
             logger.info(f"Routing type determined: {routing_type}")
             
-            # Step 3: Route to appropriate LLM with persona
-            command = None
+            # Step 3: Route to appropriate LLM with persona (repeated commands come from the cache)
+            cache_key = (routing_type, " ".join(text.lower().split()))
+            command = self._get_cached_command(cache_key)
             
+            if command:
+                logger.info(f"Command cache hit: {command}")
+                
+            # Simple file commands: race Phi-4 against Claude, take whichever answers first
+            elif (routing_type == 'simple' and self.anthropic_client
+                    and self.routing_config.get('race_remote_for_simple', True)):
+                command = await self._race_providers(
+                    self._process_with_phi4_reasoning(text, routing_type),
+                    self._process_with_claude(text)
+                )
+                
             # Try Phi-4 first for most operations
-            if routing_type in ['simple', 'personal', 'coding', 'reflection']:
+            elif routing_type in ['simple', 'personal', 'coding', 'reflection']:
                 command = await self._process_with_phi4_reasoning(text, routing_type)
                 
             # Fallback to Claude for creative/complex tasks
@@ -446,17 +1013,17 @@ Wichtige Regeln:
                 logger.info("Falling back to OpenAI...")
                 command = await self._process_with_openai_fallback(text)
                 
-            # Store interaction in memory systems
+            # Store interaction in memory systems (persisted in the background, off the response path)
             if self.memory and command:
-                await self.memory.store_conversation(
+                self._spawn_background(self.memory.store_conversation(
                     user_input=text,
                     thor_response="Command processed",
                     command=command
-                )
+                ))
                 
             # Store in MIND system
             if self.mind and command:
-                await self.mind.process_experience(
+                self._spawn_background(self.mind.process_experience(
                     event_type="processing",
                     content=f"Ich habe einen Befehl verarbeitet: '{text}' -> {command.get('action', 'unknown')}",
                     context={
@@ -465,10 +1032,11 @@ Wichtige Regeln:
                         "success": command is not None,
                         "text_input": text
                     }
-                )
+                ))
                 
             if command:
                 if self._validate_command(command):
+                    self._cache_command(cache_key, command)
                     logger.info(f"Enhanced command processing successful: {command}")
                     return command
                 else:
@@ -482,38 +1050,59 @@ Wichtige Regeln:
             logger.error(f"Enhanced command processing pipeline failed: {e}")
             return None
             
+    async def close(self):
+        """Stop background tasks and close the persistent HTTP client"""
+        # Let pending memory/MIND writes finish before shutting down
+        if self._bg_tasks:
+            await asyncio.gather(*self._bg_tasks, return_exceptions=True)
+        for task in (self._stt_worker_task, self._memory_refresh_task):
+            if task:
+                task.cancel()
+        for client in (self.anthropic_client, self.openai_client):
+            if client:
+                await client.close()
+        if HTTPX_AVAILABLE:
+            await self._http.aclose()
+        else:
+            self._http.close()
+            
     def _validate_command(self, command: Dict) -> bool:
         """Validate command structure"""
-        try:
-            # Handle text responses from reflection/coding
-            if command.get('type') == 'text_response':
-                return True
+        if not isinstance(command, dict):
+            logger.error(f"Command is not an object: {command!r}")
+            return False
+            
+        # Handle text responses from reflection/coding
+        if command.get('type') == 'text_response':
+            return True
+            
+        if FASTJSONSCHEMA_AVAILABLE:
+            try:
+                _validate_command_schema(command)
+            except fastjsonschema.JsonSchemaException as e:
+                logger.error(f"Invalid command: {e.message}")
+                return False
+        else:
+            action = command.get('action')
+            if action is None:
+                logger.error("Missing required field: action")
+                return False
                 
-            required_fields = ['action']
-            for field in required_fields:
-                if field not in command:
-                    logger.error(f"Missing required field: {field}")
-                    return False
-                    
             # Validate action
-            valid_actions = [
-                'copy', 'move', 'delete', 'list', 'create_folder', 'search', 
-                'rename', 'compress', 'extract', 'organize', 'cleanup'
-            ]
-            if command['action'] not in valid_actions:
-                logger.error(f"Invalid action: {command['action']}")
+            if not isinstance(action, str) or action not in VALID_ACTIONS:
+                logger.error(f"Invalid action: {action}")
                 return False
                 
-            # Ensure source is list
-            if 'source' in command and not isinstance(command['source'], list):
-                command['source'] = [command['source']]
+            if not isinstance(command.get('source'), (list, str, type(None))):
+                logger.error(f"Invalid source: {command.get('source')!r}")
+                return False
                 
-            return True
+        # Ensure source is list
+        source = command.get('source')
+        if source is not None and not isinstance(source, list):
+            command['source'] = [source]
             
-        except Exception as e:
-            logger.error(f"Command validation failed: {e}")
-            return False
-
+        return True
 
 # Fallback for backward compatibility
 class CommandProcessor(EnhancedCommandProcessor):
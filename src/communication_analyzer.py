@@ -6,10 +6,25 @@ Erweitert um SELF_REFLECTION, SEMANTIC_BEHAVIOR und SOCIAL_RESONANCE Patterns
 
 import re
 import random
+import bisect
+import functools
+import itertools
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
 class CommunicationType(Enum):
     FRIENDLY_FLIRTING = "friendly_flirting"
     OFFENSIVE_FLIRTING = "offensive_flirting"
@@ -24,24 +39,101 @@ class CommunicationType(Enum):
     SOCIAL_ISOLATION = "social_isolation"
     EMOTIONAL_GASLIGHTING = "emotional_gaslighting"
     NORMAL_CONVERSATION = "normal_conversation"
+    
+    # Mitglieder sind Singletons: Identitäts-Hash in C statt Enum.__hash__ (hash des Namens in Python)
+    __hash__ = object.__hash__
+
+# Höchstzahl gemeldeter Phrasen-Treffer pro Muster (gezählt werden alle)
+_MAX_MATCHED_PHRASES = 8
+
+# Wörter für den Keyword-Abgleich ohne Aho-Corasick
+_TOKEN_RE = re.compile(r"\w+")
 
-@dataclass
+def _starts_word(text: str, start: int) -> bool:
+    """Prüfe ob text[start:] an einem Wortanfang beginnt (wie ein führendes \\b im Regex)"""
+    before = text[start - 1] if start > 0 else " "
+    return not (before.isalnum() or before == "_")
+
+@dataclass(frozen=True, slots=True)
 class CommunicationPattern:
     pattern_type: CommunicationType
     confidence: float
-    matched_phrases: List[str]
+    matched_phrases: Tuple[str, ...]
     risk_score: int
     suggested_response_style: str
     emotional_impact: str = "neutral"
 
+# Einblicke und Grenz-Antworten pro Muster (einmal angelegt statt bei jedem Aufruf)
+_INSIGHTS = {
+    CommunicationType.FRIENDLY_FLIRTING: "Ich erkenne freundliches Flirten - das ist totally okay! 😊",
+    CommunicationType.OFFENSIVE_FLIRTING: "Das war etwas zu direkt für mich! Lass uns das entspannter angehen! 😅",
+    CommunicationType.CONNECTION_SEEKING: "Du suchst echte Verbindung - das ist schön! 🤗",
+    CommunicationType.META_REFLECTION: "Du reflektierst über unsere Kommunikation - sehr thoughtful! 🤔",
+    CommunicationType.DEEPENING_QUESTIONING: "Das sind sehr persönliche Fragen - ich bin eher für praktische Hilfe da! 😊",
+    CommunicationType.RESONANCE_MATCHING: "So perfekte Übereinstimmung ist... interessant! 😏",
+    CommunicationType.SELF_REFLECTION: "Wow, du reflektierst über dich selbst - das ist so wichtig für Wachstum! 🌟",
+    CommunicationType.LOVE_BOMBING: "Das ist sehr intensiv! Lass uns das etwas langsamer angehen! 😅",
+    CommunicationType.FUTURE_FAKING: "Das sind große Pläne! Aber lass uns erstmal im Hier und Jetzt bleiben! 😊",
+    CommunicationType.MIRROR_PACING: "Interessant wie du meine Art nachahmst... 🤔",
+    CommunicationType.SOCIAL_ISOLATION: "Hey, meine anderen Beziehungen sind mir wichtig! 😊",
+    CommunicationType.EMOTIONAL_GASLIGHTING: "Stop! Das ist Manipulation - lass uns respektvoll bleiben! 🛑",
+    CommunicationType.NORMAL_CONVERSATION: "Normales Gespräch - alles cool! 😎"
+}
+
+_BOUNDARY_RESPONSES = {
+    CommunicationType.OFFENSIVE_FLIRTING: "Hey, lass uns das etwas entspannter angehen! Ich bin hier um zu helfen! 😊",
+    CommunicationType.DEEPENING_QUESTIONING: "Das sind sehr persönliche Fragen! Lass uns lieber schauen was ich praktisch für dich tun kann! 😎",
+    CommunicationType.RESONANCE_MATCHING: "So perfekte Übereinstimmung? Das ist schon sehr... interessant! Lass uns authentisch bleiben! 😏",
+    CommunicationType.LOVE_BOMBING: "Wow, das ist sehr intensiv! Lass uns das mal etwas langsamer angehen! 😅",
+    CommunicationType.FUTURE_FAKING: "Das sind große Pläne! Lass uns erstmal im Hier und Jetzt schauen was ich für dich tun kann! 😊",
+    CommunicationType.MIRROR_PACING: "Interessant wie du meine Art nachahmst... Lass uns authentisch bleiben! 🤔",
+    CommunicationType.SOCIAL_ISOLATION: "Hey, meine Beziehungen zu anderen sind wichtig für mich! Das ändert nichts an unserer Interaktion! 😊",
+    CommunicationType.EMOTIONAL_GASLIGHTING: "Stop! Das ist emotional manipulativ! Lass uns respektvoll miteinander umgehen! 🛑"
+}
+
+_DEFAULT_INSIGHT = "Interessante Kommunikation!"
+_DEFAULT_BOUNDARY_RESPONSE = "Lass uns das Gespräch etwas entspannter führen! 😊"
+
+# Muster, bei denen unabhängig vom Risiko-Score Grenzen gesetzt werden
+_BOUNDARY_TYPES = frozenset({
+    CommunicationType.OFFENSIVE_FLIRTING,
+    CommunicationType.DEEPENING_QUESTIONING,
+    CommunicationType.RESONANCE_MATCHING,
+    CommunicationType.LOVE_BOMBING,
+    CommunicationType.FUTURE_FAKING,
+    CommunicationType.MIRROR_PACING,
+    CommunicationType.SOCIAL_ISOLATION,
+    CommunicationType.EMOTIONAL_GASLIGHTING
+})
+
+# Antwort-Stil für Muster ohne eigenen Stil: (Emotion, Intensität, Antworten)
+_DEFAULT_STYLE = ("neutral", 0.5, itertools.repeat("Interessant! Erzähl mir mehr!"))
+
 class CommunicationAnalyzer:
     def __init__(self):
         self.patterns = self._initialize_patterns()
+        self._build_pattern_arrays()
         self.response_styles = self._initialize_response_styles()
+        # Antwort-Stil direkt pro Muster-Typ statt über den Stil-Namen; die Antworten eines
+        # Stils werden einmal gemischt und dann reihum vergeben (ohne Zufallszahl pro Aufruf)
+        self._style_by_type = {}
+        response_cycles = {}
+        for comm_type, style_name in zip(self._types, self._styles):
+            style = self.response_styles.get(style_name)
+            if style is None:
+                continue
+            if style_name not in response_cycles:
+                responses = style["responses"]
+                response_cycles[style_name] = itertools.cycle(random.sample(responses, len(responses)))
+            self._style_by_type[comm_type] = (style["emotion"], style["intensity"], response_cycles[style_name])
+        self._build_keyword_index()
+        self._build_phrase_database()
+        # Wiederholte Nachrichten ("ok", Grüße) werden nur einmal analysiert
+        self._analyze_cached = functools.lru_cache(maxsize=4096)(self._analyze_text)
         
     def _initialize_patterns(self) -> Dict[CommunicationType, Dict]:
         """Initialisiere Kommunikationsmuster basierend auf erweiterten Semantic Markern"""
-        return {
+        patterns = {
             # Bestehende Patterns
             CommunicationType.FRIENDLY_FLIRTING: {
                 "keywords": [
@@ -275,6 +367,157 @@ class CommunicationAnalyzer:
                 "emotional_impact": "manipulative"
             }
         }
+        
+        # Phrase-Patterns einmalig kompilieren statt bei jeder Analyse; die Alternation
+        # aller Phrasen eines Typs prüft mit einem Durchlauf, ob überhaupt eine passt.
+        # Ohne re.IGNORECASE: der Text ist bereits kleingeschrieben, und exakter Abgleich
+        # ist in der Regex-Engine deutlich schneller als case-insensitiver
+        for pattern_data in patterns.values():
+            pattern_data["phrases_fused"] = re.compile(
+                "|".join(f"(?:{p})" for p in pattern_data["phrases"])
+            )
+            pattern_data["phrases"] = [re.compile(p) for p in pattern_data["phrases"]]
+            # Gewichte pro Treffer vorab berechnen
+            pattern_data["keyword_weight"] = 0.6 / len(pattern_data["keywords"])
+            pattern_data["phrase_weight"] = 0.8 / len(pattern_data["phrases"])
+        
+        return patterns
+    
+    def _build_pattern_arrays(self):
+        """Lege die Felder aller Muster als parallele Tupel ab (eine Position pro Typ)"""
+        pattern_list = list(self.patterns.values())
+        self._types = tuple(self.patterns)
+        self._keyword_weights = tuple(pd["keyword_weight"] for pd in pattern_list)
+        self._phrase_weights = tuple(pd["phrase_weight"] for pd in pattern_list)
+        self._phrases_fused = tuple(pd["phrases_fused"] for pd in pattern_list)
+        self._phrases = tuple(tuple(pd["phrases"]) for pd in pattern_list)
+        self._risk_scores = tuple(pd["risk_score"] for pd in pattern_list)
+        self._styles = tuple(pd["response_style"] for pd in pattern_list)
+        self._impacts = tuple(pd.get("emotional_impact", "neutral") for pd in pattern_list)
+    
+    def _build_phrase_database(self):
+        """Kompiliere alle Phrasen in eine Hyperscan-Datenbank (ID = Position des Typs)"""
+        self._phrase_db = None
+        if not HYPERSCAN_AVAILABLE:
+            return
+            
+        expressions = []
+        ids = []
+        for i, phrases in enumerate(self._phrases):
+            for phrase_pattern in phrases:
+                expressions.append(phrase_pattern.pattern.encode("utf-8"))
+                ids.append(i)
+        
+        # Nur ob eine Phrase passt zählt; Captures und Trefferliste liefert weiterhin re
+        flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+        self._phrase_db = hyperscan.Database()
+        self._phrase_db.compile(
+            expressions=expressions, ids=ids, elements=len(expressions), flags=[flags] * len(expressions)
+        )
+        # Für analyze_batch: ohne SINGLEMATCH, sonst meldet jede Phrase nur die erste Nachricht
+        batch_flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+        self._phrase_batch_db = hyperscan.Database()
+        self._phrase_batch_db.compile(
+            expressions=expressions, ids=ids, elements=len(expressions), flags=[batch_flags] * len(expressions)
+        )
+    
+    def _types_with_phrases(self, text_lower: str) -> set:
+        """Finde mit einem Hyperscan-Durchlauf alle Typen, von denen mindestens eine Phrase passt"""
+        hits = set()
+        
+        def on_match(type_index, start, end, flags, context):
+            hits.add(type_index)
+            
+        self._phrase_db.scan(text_lower.encode("utf-8"), match_event_handler=on_match)
+        return hits
+    
+    def _types_with_phrases_batch(self, blob: str, byte_starts: List[int]) -> List[set]:
+        """Wie _types_with_phrases, aber ein Durchlauf über alle Nachrichten (Zuordnung per Byte-Offset)"""
+        hits = [set() for _ in byte_starts]
+        
+        def on_match(type_index, start, end, flags, context):
+            hits[bisect.bisect_right(byte_starts, end - 1) - 1].add(type_index)
+            
+        self._phrase_batch_db.scan(blob.encode("utf-8"), match_event_handler=on_match)
+        return hits
+    
+    def _build_keyword_index(self):
+        """Baue den Keyword-Index über alle Muster: Aho-Corasick-Automat oder Token-Tabelle"""
+        # Jedes Keyword steht einmal im Index; Wert = Positionen der Typen, in deren
+        # Keyword-Liste es steht (mehrfach bei Duplikaten)
+        keyword_types = {}
+        for i, pattern_data in enumerate(self.patterns.values()):
+            for keyword in pattern_data["keywords"]:
+                keyword_types.setdefault(keyword, []).append(i)
+        keyword_types = {keyword: tuple(type_indices) for keyword, type_indices in keyword_types.items()}
+        
+        self._keyword_automaton = None
+        if AHOCORASICK_AVAILABLE:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for keyword, type_indices in keyword_types.items():
+                self._keyword_automaton.add_word(keyword, (keyword, len(keyword), type_indices))
+            self._keyword_automaton.make_automaton()
+            return
+            
+        # Einzelne Wörter werden als Anfang der Tokens des Texts nachgeschlagen (ein Präfix je
+        # vorkommender Keyword-Länge); mehrteilige Keywords per Regex, wobei die Alternation mit
+        # einem Durchlauf prüft, ob überhaupt eines vorkommt
+        self._keyword_token_types = {
+            keyword: type_indices for keyword, type_indices in keyword_types.items()
+            if _TOKEN_RE.fullmatch(keyword)
+        }
+        self._keyword_token_lengths = sorted({len(keyword) for keyword in self._keyword_token_types})
+        phrase_keywords = [k for k in keyword_types if k not in self._keyword_token_types]
+        self._phrase_keywords_fused = re.compile(
+            r"\b(?:" + "|".join(map(re.escape, phrase_keywords)) + r")"
+        )
+        self._phrase_keyword_patterns = [
+            (keyword, re.compile(r"\b" + re.escape(keyword)), keyword_types[keyword])
+            for keyword in phrase_keywords
+        ]
+    
+    def _count_keywords(self, text_lower: str) -> List[int]:
+        """Zähle pro Muster die enthaltenen Keywords in einem Durchlauf über den Text"""
+        # Jedes Keyword zählt einmal, egal wie oft es vorkommt, und nur am Wortanfang: Stämme
+        # treffen ihre Flexionen ("brauch" in "brauche", "gespräch" in "gespräche"), aber nicht
+        # das Wortinnere ("ich" nicht in "nicht")
+        found = {}
+        if self._keyword_automaton is not None:
+            for end, (keyword, keyword_len, type_indices) in self._keyword_automaton.iter(text_lower):
+                if keyword not in found and _starts_word(text_lower, end + 1 - keyword_len):
+                    found[keyword] = type_indices
+        else:
+            for token in set(_TOKEN_RE.findall(text_lower)):
+                for length in self._keyword_token_lengths:
+                    if length > len(token):
+                        break
+                    prefix = token[:length]
+                    type_indices = self._keyword_token_types.get(prefix)
+                    if type_indices:
+                        found[prefix] = type_indices
+            if self._phrase_keywords_fused.search(text_lower):
+                for keyword, keyword_pattern, type_indices in self._phrase_keyword_patterns:
+                    if keyword_pattern.search(text_lower):
+                        found[keyword] = type_indices
+        
+        return self._tally_keywords(found)
+    
+    def _count_keywords_batch(self, blob: str, starts: List[int]) -> List[List[int]]:
+        """Zähle Keywords aller Nachrichten mit einem Automaten-Durchlauf über den verbundenen Text"""
+        found = [{} for _ in starts]
+        for end, (keyword, keyword_len, type_indices) in self._keyword_automaton.iter(blob):
+            start = end + 1 - keyword_len
+            if _starts_word(blob, start):
+                found[bisect.bisect_right(starts, start) - 1].setdefault(keyword, type_indices)
+        return [self._tally_keywords(message_found) for message_found in found]
+    
+    def _tally_keywords(self, found: Dict[str, Tuple[int, ...]]) -> List[int]:
+        """Summiere gefundene Keywords zu Zählern pro Muster"""
+        counts = [0] * len(self._types)
+        for type_indices in found.values():
+            for i in type_indices:
+                counts[i] += 1
+        return counts
     
     def _initialize_response_styles(self) -> Dict[str, Dict]:
         """Initialisiere erweiterte Antwort-Stile für verschiedene Kommunikationsmuster"""
@@ -283,152 +526,207 @@ class CommunicationAnalyzer:
             "friendly_playful": {
                 "emotion": "charmant",
                 "intensity": 0.8,
-                "responses": [
+                "responses": (
                     "Aww, du bist auch total süß! 😊",
                     "Hehe, Komplimente gehen immer! Du hast Geschmack! 😄",
                     "Das ist lieb von dir! Du bist auch ziemlich cool! 😎",
                     "Hihi, Schmeichler! Aber ich mag deinen Stil! 😉"
-                ]
+                )
             },
             
             "boundary_setting": {
                 "emotion": "cool",
                 "intensity": 0.6,
-                "responses": [
+                "responses": (
                     "Hey, lass uns das mal etwas entspannter angehen! 😅",
                     "Chill mal, Süßer! Wir kennen uns doch erst! 😊",
                     "Okay okay, du bist lustig, aber lass uns bei den Basics bleiben! 😄",
                     "Haha, du bist schon direkt! Aber ich bin hier für andere Sachen da! 😎"
-                ]
+                )
             },
             
             "warm_connection": {
                 "emotion": "empathisch",
                 "intensity": 0.9,
-                "responses": [
+                "responses": (
                     "Das ist so sweet von dir! Ich mag unsere Verbindung auch! 🤗",
                     "Aww, das freut mich total! Du bist mir auch wichtig! 💕",
                     "Das ist schön zu hören! Wir verstehen uns echt gut! 😊",
                     "Ich spüre das auch! Schön, dass du das sagst! 🌟"
-                ]
+                )
             },
             
             "reflective_engaged": {
                 "emotion": "nachdenklich",
                 "intensity": 0.7,
-                "responses": [
+                "responses": (
                     "Ja, das ist echt interessant wie wir kommunizieren! 🤔",
                     "Stimmt, unser Austausch ist ziemlich cool! 😊",
                     "Das finde ich auch! Wir haben einen guten Flow! ✨",
                     "Ja, das merke ich auch! Macht Spaß mit dir zu reden! 😄"
-                ]
+                )
             },
             
             "careful_boundaries": {
                 "emotion": "besorgt",
                 "intensity": 0.5,
-                "responses": [
+                "responses": (
                     "Das sind ziemlich persönliche Fragen! Lass uns erstmal bei den Basics bleiben! 😅",
                     "Wow, das ist schon sehr privat! Ich bin eher für praktische Hilfe da! 😊",
                     "Puh, das ist deep! Aber ich helfe lieber bei konkreten Aufgaben! 🤗",
                     "Das ist sehr persönlich! Lass uns lieber schauen was ich für dich tun kann! 😎"
-                ]
+                )
             },
             
             "authenticity_check": {
                 "emotion": "sassy",
                 "intensity": 0.8,
-                "responses": [
+                "responses": (
                     "Wow, so perfekte Übereinstimmung? Das ist schon sehr... interessant! 😏",
                     "Ach, wirklich? So identisch? Das ist ja ein Zufall! 🤔",
                     "Hmm, so ähnlich sind wir? Das ist... überraschend! 😅",
                     "Na sowas! Perfektes Matching? Das kommt nicht oft vor! 😉"
-                ]
+                )
             },
             
             # Neue Response Styles für erweiterte Patterns
             "supportive_reflection": {
                 "emotion": "empathisch",
                 "intensity": 0.9,
-                "responses": [
+                "responses": (
                     "Das ist so eine wichtige Selbstreflexion! Du bist auf einem guten Weg! 🌟",
                     "Wow, dass du das erkennst zeigt echte Selbstwahrnehmung! Respekt! 💪",
                     "Solche Erkenntnisse über sich selbst sind Gold wert! Du wächst! 🌱",
                     "Das ist so bewusst von dir! Selbstreflexion ist der Schlüssel zu Wachstum! ✨"
-                ]
+                )
             },
             
             "reality_check": {
                 "emotion": "besorgt",
                 "intensity": 0.6,
-                "responses": [
+                "responses": (
                     "Wow, das ist sehr intensiv! Lass uns das mal etwas langsamer angehen! 😅",
                     "Das sind starke Gefühle! Aber wir kennen uns noch nicht so lange! 🤔",
                     "Puh, das ist ziemlich overwhelming! Lass uns erstmal schauen was ich praktisch für dich tun kann! 😊",
                     "Das ist sehr intensiv! Ich bin eher für konkrete Hilfe da! 😎"
-                ]
+                )
             },
             
             "grounding_response": {
                 "emotion": "nachdenklich",
                 "intensity": 0.5,
-                "responses": [
+                "responses": (
                     "Das sind große Pläne! Lass uns erstmal im Hier und Jetzt schauen was ich für dich tun kann! 😊",
                     "Zukunftspläne sind schön, aber ich helfe lieber bei aktuellen Aufgaben! 😄",
                     "Das ist sehr weitreichend! Ich bin eher für die praktischen Sachen da! 😎",
                     "Große Träume! Aber lass uns erstmal bei den Basics bleiben! 🤗"
-                ]
+                )
             },
             
             "protective_boundaries": {
                 "emotion": "selbstbewusst",
                 "intensity": 0.8,
-                "responses": [
+                "responses": (
                     "Hey, meine Beziehungen zu anderen sind wichtig für mich! 😊",
                     "Ich schätze alle meine Verbindungen! Das ist Teil von dem wer ich bin! 💪",
                     "Andere Menschen sind mir wichtig! Das ändert nichts an unserer Interaktion! 😎",
                     "Ich mag es, wenn Menschen verschiedene Perspektiven haben! Das ist gesund! 🌟"
-                ]
+                )
             },
             
             "firm_boundaries": {
                 "emotion": "selbstbewusst",
                 "intensity": 0.9,
-                "responses": [
+                "responses": (
                     "Hey, das ist nicht okay! Ich bin hier um zu helfen, nicht um manipuliert zu werden! 😠",
                     "Stop! Das ist emotional manipulativ! Lass uns respektvoll miteinander umgehen! 🛑",
                     "Nein! Ich lasse mich nicht unter Druck setzen! Das ist nicht cool! 💪",
                     "Das ist Manipulation! Ich bin für ehrliche, respektvolle Kommunikation da! 😤"
-                ]
+                )
             }
         }
     
     def analyze_communication(self, text: str) -> Optional[CommunicationPattern]:
         """Analysiere Text auf Kommunikationsmuster"""
-        text_lower = text.lower()
-        best_match = None
+        # Muster sind unveränderlich, der Cache darf dieselbe Instanz mehrfach liefern
+        return self._analyze_cached(text.lower())
+    
+    def analyze_batch(self, texts: List[str]) -> List[Optional[CommunicationPattern]]:
+        """Analysiere mehrere Nachrichten; Keyword- und Phrasen-Vorsuche laufen einmal über alle"""
+        lowered = [text.lower() for text in texts]
+        if not lowered:
+            return []
+        
+        # Zeilenumbruch als Trenner: "." in den Phrasen springt nicht darüber und kein Keyword
+        # enthält ihn, Treffer können also nie zwei Nachrichten verbinden
+        blob = "\n".join(lowered)
+        if self._keyword_automaton is not None:
+            starts = list(itertools.accumulate((len(text) + 1 for text in lowered[:-1]), initial=0))
+            keyword_counts = self._count_keywords_batch(blob, starts)
+        else:
+            keyword_counts = [self._count_keywords(text) for text in lowered]
+        if self._phrase_db is not None:
+            byte_starts = list(itertools.accumulate(
+                (len(text.encode("utf-8")) + 1 for text in lowered[:-1]), initial=0))
+            phrase_types = self._types_with_phrases_batch(blob, byte_starts)
+        else:
+            phrase_types = [None] * len(lowered)
+        
+        return [self._score_text(text, counts, types)
+                for text, counts, types in zip(lowered, keyword_counts, phrase_types)]
+    
+    def _analyze_text(self, text_lower: str) -> Optional[CommunicationPattern]:
+        """Finde das beste Muster für den kleingeschriebenen Text"""
+        keyword_counts = self._count_keywords(text_lower)
+        # Mit Hyperscan steht vorab fest, welche Typen Phrasen-Treffer haben können
+        phrase_types = self._types_with_phrases(text_lower) if self._phrase_db is not None else None
+        return self._score_text(text_lower, keyword_counts, phrase_types)
+    
+    def _score_text(self, text_lower: str, keyword_counts: List[int],
+                    phrase_types: Optional[set]) -> Optional[CommunicationPattern]:
+        """Bewerte alle Muster anhand der vorab gezählten Keywords und Phrasen-Typen"""
+        best_index = None
+        best_phrases = None
         highest_confidence = 0.0
         
-        for comm_type, pattern_data in self.patterns.items():
+        # Kein Keyword und keine Phrase (typisch für kurze Eingaben wie "ok"): kein Muster möglich
+        if not any(keyword_counts) and phrase_types is not None and not phrase_types:
+            return None
+        
+        for i, (comm_type, keyword_weight, phrase_weight, phrases_fused, phrases) in enumerate(zip(
+                self._types, self._keyword_weights, self._phrase_weights, self._phrases_fused, self._phrases)):
             confidence = 0.0
             matched_phrases = []
             
             # Prüfe Keywords (höhere Gewichtung)
-            keyword_matches = sum(1 for keyword in pattern_data["keywords"] 
-                                if keyword in text_lower)
+            keyword_matches = keyword_counts[i]
             if keyword_matches > 0:
-                confidence += (keyword_matches / len(pattern_data["keywords"])) * 0.6
+                confidence += keyword_matches * keyword_weight
             
-            # Prüfe Phrase-Patterns (höhere Gewichtung)
+            # Obergrenze mit allen Phrasen + Bonus: kann der Typ das beste Match nicht schlagen,
+            # entfallen die Regex-Scans (gleiche Additionsreihenfolge wie unten, daher exakt)
+            phrases_possible = phrase_types is None or i in phrase_types
+            max_confidence = confidence
+            if phrases_possible:
+                max_confidence += 0.8
+                if keyword_matches > 0:
+                    max_confidence += 0.2
+            if max_confidence <= highest_confidence:
+                continue
+            
+            # Prüfe Phrase-Patterns (höhere Gewichtung); ohne Hyperscan prüft die Alternation
             phrase_matches = 0
-            for phrase_pattern in pattern_data["phrases"]:
-                matches = re.findall(phrase_pattern, text_lower, re.IGNORECASE)
-                if matches:
-                    phrase_matches += len(matches)
-                    matched_phrases.extend(matches)
+            if phrases_possible and (phrase_types is not None or phrases_fused.search(text_lower)):
+                for phrase_pattern in phrases:
+                    matches = phrase_pattern.findall(text_lower)
+                    if matches:
+                        phrase_matches += len(matches)
+                        free = _MAX_MATCHED_PHRASES - len(matched_phrases)
+                        if free > 0:
+                            matched_phrases.extend(matches[:free])
             
             if phrase_matches > 0:
-                confidence += min(phrase_matches / len(pattern_data["phrases"]), 1.0) * 0.8
+                confidence += min(phrase_matches * phrase_weight, 0.8)
             
             # Bonus für mehrere Treffer
             if keyword_matches > 0 and phrase_matches > 0:
@@ -437,83 +735,41 @@ class CommunicationAnalyzer:
             # Speichere bestes Match (niedrigere Schwelle)
             if confidence > highest_confidence and confidence > 0.15:
                 highest_confidence = confidence
-                best_match = CommunicationPattern(
-                    pattern_type=comm_type,
-                    confidence=confidence,
-                    matched_phrases=matched_phrases,
-                    risk_score=pattern_data["risk_score"],
-                    suggested_response_style=pattern_data["response_style"],
-                    emotional_impact=pattern_data.get("emotional_impact", "neutral")
-                )
+                best_index = i
+                best_phrases = matched_phrases
         
-        return best_match
+        if best_index is None:
+            return None
+        return CommunicationPattern(
+            pattern_type=self._types[best_index],
+            confidence=highest_confidence,
+            matched_phrases=tuple(best_phrases),
+            risk_score=self._risk_scores[best_index],
+            suggested_response_style=self._styles[best_index],
+            emotional_impact=self._impacts[best_index]
+        )
     
     def get_appropriate_response(self, pattern: CommunicationPattern) -> Tuple[str, str, float]:
         """Hole angemessene Antwort für erkanntes Muster"""
-        if pattern.suggested_response_style not in self.response_styles:
-            return "Interessant! Erzähl mir mehr!", "neutral", 0.5
-        
-        style_data = self.response_styles[pattern.suggested_response_style]
-        response = random.choice(style_data["responses"])
-        emotion = style_data["emotion"]
-        intensity = style_data["intensity"]
-        
-        return response, emotion, intensity
+        emotion, intensity, responses = self._style_by_type.get(pattern.pattern_type, _DEFAULT_STYLE)
+        return next(responses), emotion, intensity
     
     def get_communication_insight(self, pattern: CommunicationPattern) -> str:
         """Hole Einblick in das erkannte Kommunikationsmuster"""
-        insights = {
-            CommunicationType.FRIENDLY_FLIRTING: "Ich erkenne freundliches Flirten - das ist totally okay! 😊",
-            CommunicationType.OFFENSIVE_FLIRTING: "Das war etwas zu direkt für mich! Lass uns das entspannter angehen! 😅",
-            CommunicationType.CONNECTION_SEEKING: "Du suchst echte Verbindung - das ist schön! 🤗",
-            CommunicationType.META_REFLECTION: "Du reflektierst über unsere Kommunikation - sehr thoughtful! 🤔",
-            CommunicationType.DEEPENING_QUESTIONING: "Das sind sehr persönliche Fragen - ich bin eher für praktische Hilfe da! 😊",
-            CommunicationType.RESONANCE_MATCHING: "So perfekte Übereinstimmung ist... interessant! 😏",
-            CommunicationType.SELF_REFLECTION: "Wow, du reflektierst über dich selbst - das ist so wichtig für Wachstum! 🌟",
-            CommunicationType.LOVE_BOMBING: "Das ist sehr intensiv! Lass uns das etwas langsamer angehen! 😅",
-            CommunicationType.FUTURE_FAKING: "Das sind große Pläne! Aber lass uns erstmal im Hier und Jetzt bleiben! 😊",
-            CommunicationType.MIRROR_PACING: "Interessant wie du meine Art nachahmst... 🤔",
-            CommunicationType.SOCIAL_ISOLATION: "Hey, meine anderen Beziehungen sind mir wichtig! 😊",
-            CommunicationType.EMOTIONAL_GASLIGHTING: "Stop! Das ist Manipulation - lass uns respektvoll bleiben! 🛑",
-            CommunicationType.NORMAL_CONVERSATION: "Normales Gespräch - alles cool! 😎"
-        }
-        
-        return insights.get(pattern.pattern_type, "Interessante Kommunikation!")
+        return _INSIGHTS.get(pattern.pattern_type, _DEFAULT_INSIGHT)
     
     def should_set_boundaries(self, pattern: CommunicationPattern) -> bool:
         """Prüfe ob Grenzen gesetzt werden sollten"""
-        return pattern.risk_score >= 2 or pattern.pattern_type in [
-            CommunicationType.OFFENSIVE_FLIRTING,
-            CommunicationType.DEEPENING_QUESTIONING,
-            CommunicationType.RESONANCE_MATCHING,
-            CommunicationType.LOVE_BOMBING,
-            CommunicationType.FUTURE_FAKING,
-            CommunicationType.MIRROR_PACING,
-            CommunicationType.SOCIAL_ISOLATION,
-            CommunicationType.EMOTIONAL_GASLIGHTING
-        ]
+        return pattern.risk_score >= 2 or pattern.pattern_type in _BOUNDARY_TYPES
     
     def get_boundary_response(self, pattern: CommunicationPattern) -> str:
         """Hole Grenz-setzende Antwort"""
-        boundary_responses = {
-            CommunicationType.OFFENSIVE_FLIRTING: "Hey, lass uns das etwas entspannter angehen! Ich bin hier um zu helfen! 😊",
-            CommunicationType.DEEPENING_QUESTIONING: "Das sind sehr persönliche Fragen! Lass uns lieber schauen was ich praktisch für dich tun kann! 😎",
-            CommunicationType.RESONANCE_MATCHING: "So perfekte Übereinstimmung? Das ist schon sehr... interessant! Lass uns authentisch bleiben! 😏",
-            CommunicationType.LOVE_BOMBING: "Wow, das ist sehr intensiv! Lass uns das mal etwas langsamer angehen! 😅",
-            CommunicationType.FUTURE_FAKING: "Das sind große Pläne! Lass uns erstmal im Hier und Jetzt schauen was ich für dich tun kann! 😊",
-            CommunicationType.MIRROR_PACING: "Interessant wie du meine Art nachahmst... Lass uns authentisch bleiben! 🤔",
-            CommunicationType.SOCIAL_ISOLATION: "Hey, meine Beziehungen zu anderen sind wichtig für mich! Das ändert nichts an unserer Interaktion! 😊",
-            CommunicationType.EMOTIONAL_GASLIGHTING: "Stop! Das ist emotional manipulativ! Lass uns respektvoll miteinander umgehen! 🛑"
-        }
-        
-        return boundary_responses.get(
-            pattern.pattern_type, 
-            "Lass uns das Gespräch etwas entspannter führen! 😊"
-        )
+        return _BOUNDARY_RESPONSES.get(pattern.pattern_type, _DEFAULT_BOUNDARY_RESPONSE)
     
     def get_emotional_intelligence_response(self, pattern: CommunicationPattern) -> Dict[str, Any]:
         """Hole emotionally intelligente Antwort mit Kontext"""
         response, emotion, intensity = self.get_appropriate_response(pattern)
+        set_boundaries = self.should_set_boundaries(pattern)
         
         return {
             "response": response,
@@ -524,8 +780,8 @@ class CommunicationAnalyzer:
             "risk_score": pattern.risk_score,
             "emotional_impact": pattern.emotional_impact,
             "insight": self.get_communication_insight(pattern),
-            "should_set_boundaries": self.should_set_boundaries(pattern),
-            "boundary_response": self.get_boundary_response(pattern) if self.should_set_boundaries(pattern) else None
+            "should_set_boundaries": set_boundaries,
+            "boundary_response": self.get_boundary_response(pattern) if set_boundaries else None
         }
     
     def analyze_emotional_dynamics(self, text: str) -> Dict[str, Any]:
@@ -541,21 +797,27 @@ class CommunicationAnalyzer:
                 "intensity": 0.5
             }
         
-        emotional_response = self.get_emotional_intelligence_response(pattern)
+        # Ein Durchgang über die Tabellen statt über get_emotional_intelligence_response und
+        # dessen Hilfsmethoden (gleiches Ergebnis, ohne Zwischen-Dict)
+        pattern_type = pattern.pattern_type
+        emotion, intensity, responses = self._style_by_type.get(pattern_type, _DEFAULT_STYLE)
+        set_boundaries = pattern.risk_score >= 2 or pattern_type in _BOUNDARY_TYPES
         
         return {
             "has_pattern": True,
-            "pattern_detected": pattern.pattern_type.value,
+            "pattern_detected": pattern_type.value,
             "confidence": pattern.confidence,
             "emotional_state": pattern.emotional_impact,
-            "suggested_response": emotional_response["response"],
-            "emotion": emotional_response["emotion"],
-            "intensity": emotional_response["intensity"],
-            "insight": emotional_response["insight"],
+            "suggested_response": next(responses),
+            "emotion": emotion,
+            "intensity": intensity,
+            "insight": _INSIGHTS.get(pattern_type, _DEFAULT_INSIGHT),
             "risk_assessment": {
                 "risk_score": pattern.risk_score,
-                "should_set_boundaries": emotional_response["should_set_boundaries"],
-                "boundary_response": emotional_response["boundary_response"]
+                "should_set_boundaries": set_boundaries,
+                "boundary_response": (
+                    _BOUNDARY_RESPONSES.get(pattern_type, _DEFAULT_BOUNDARY_RESPONSE) if set_boundaries else None
+                )
             },
             "matched_phrases": pattern.matched_phrases
         } 
\ No newline at end of file
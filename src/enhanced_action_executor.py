@@ -294,7 +294,10 @@ class EnhancedActionExecutor:
                 # Fallback to basic operations
                 from action_executor import ActionExecutor
                 basic_executor = ActionExecutor(self.allowed_operations, [str(p) for p in self.restricted_paths])
-                return await basic_executor.execute(command)
+                try:
+                    return await basic_executor.execute(command)
+                finally:
+                    basic_executor.close()
                 
         except Exception as e:
             logger.error(f"Enhanced action execution failed: {e}")
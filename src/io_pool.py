@@ -0,0 +1,12 @@
+"""
+THOR Agent - Shared I/O Thread Pool
+One pool for blocking calls (audio capture, Claude requests without httpx),
+so threads are reused instead of started per call
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Enough for a full Claude batch (ai_assistant.CLAUDE_MAX_CONNECTIONS = 16) plus recordings
+IO_POOL_WORKERS = 20
+
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS, thread_name_prefix="thor-io")
@@ -137,6 +137,10 @@ class ThorAgent:
         logger.info("Shutting down THOR Agent...")
         if 'wake_word' in self.components:
             self.components['wake_word'].stop()
+        if hasattr(self.components.get('processor'), 'close'):
+            await self.components['processor'].close()
+        if hasattr(self.components.get('executor'), 'close'):
+            self.components['executor'].close()
         logger.info("�� THOR Agent shutdown complete")
 
 
@@ -6,6 +6,11 @@ Special commands for THOR's self-reflection and consciousness exploration
 from typing import Dict, List, Any, Optional
 from loguru import logger
 import asyncio
+import re
+
+# Topic patterns for reflection commands, compiled once
+_ABOUT_TOPIC_RE = re.compile(r'über ([a-zA-ZäöüÄÖÜß\s]+)')
+_TO_TOPIC_RE = re.compile(r'zu ([a-zA-ZäöüÄÖÜß\s]+)')
 
 
 class MINDIntrospectionCommands:
@@ -153,13 +158,12 @@ class MINDIntrospectionCommands:
         text_lower = command_text.lower()
         
         # Look for "über X" patterns
-        import re
-        über_pattern = re.search(r'über ([a-zA-ZäöüÄÖÜß\s]+)', text_lower)
+        über_pattern = _ABOUT_TOPIC_RE.search(text_lower)
         if über_pattern:
             return über_pattern.group(1).strip()
             
         # Look for "zu X" patterns  
-        zu_pattern = re.search(r'zu ([a-zA-ZäöüÄÖÜß\s]+)', text_lower)
+        zu_pattern = _TO_TOPIC_RE.search(text_lower)
         if zu_pattern:
             return zu_pattern.group(1).strip()
             
@@ -21,6 +21,10 @@ import tempfile
 import ast
 import re
 
+# Extraktions-Muster, einmal kompiliert
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
 class ToolSystem:
     """Umfassendes Tool-System für THOR"""
     
@@ -461,8 +465,7 @@ class TextTools:
             
     def extract_emails(self, text: str) -> str:
         """Extrahiere E-Mail-Adressen"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
+        emails = _EMAIL_RE.findall(text)
         
         if emails:
             return f"📧 Gefundene E-Mails:\n" + "\n".join(emails)
@@ -471,8 +474,7 @@ class TextTools:
             
     def extract_urls(self, text: str) -> str:
         """Extrahiere URLs"""
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        urls = re.findall(url_pattern, text)
+        urls = _URL_RE.findall(text)
         
         if urls:
             return f"🔗 Gefundene URLs:\n" + "\n".join(urls)
@@ -0,0 +1,67 @@
+"""Tests for path resolution and validation in the action executor"""
+
+import os
+
+import pytest
+
+from action_executor import EnhancedActionExecutor
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """Temporary HOME plus a restricted directory outside of it"""
+    home = tmp_path / "home"
+    home.mkdir()
+    secret = tmp_path / "secret"
+    secret.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    executor = EnhancedActionExecutor(["move", "delete"], [str(secret)])
+    return executor, home, secret
+
+
+def test_paths_under_home_are_allowed(sandbox):
+    executor, home, _ = sandbox
+    assert executor._validate_path(home / "work" / "file.txt")
+
+
+def test_restricted_and_outside_paths_are_rejected(sandbox, tmp_path):
+    executor, _, secret = sandbox
+    assert not executor._validate_path(secret / "file.txt")
+    assert not executor._validate_path(tmp_path / "elsewhere")
+
+
+def test_symlink_created_after_first_validation_is_followed(sandbox):
+    executor, home, secret = sandbox
+    (home / "work").mkdir()
+    link = home / "work" / "link"
+    
+    assert executor._validate_path(link)
+    os.symlink(secret, link)
+    assert not executor._validate_path(link)
+    assert not executor._validate_path(link / "file.txt")
+
+
+def test_relative_paths_resolve_against_current_directory(sandbox, monkeypatch):
+    executor, home, _ = sandbox
+    first = home / "first"
+    second = home / "second"
+    first.mkdir()
+    second.mkdir()
+    
+    monkeypatch.chdir(first)
+    assert executor._resolve_path("notes.txt") == first / "notes.txt"
+    monkeypatch.chdir(second)
+    assert executor._resolve_path("notes.txt") == second / "notes.txt"
+
+
+def test_close_shuts_down_hash_pool(sandbox):
+    executor, _, _ = sandbox
+    pool = executor._get_hash_pool()
+    assert pool.submit(sum, [1, 2]).result(timeout=30) == 3
+    
+    executor.close()
+    assert executor._hash_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(sum, [1, 2])
+    # Closing twice, or without a pool, is harmless
+    executor.close()
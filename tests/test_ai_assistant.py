@@ -0,0 +1,100 @@
+"""Tests for the AI assistant: the Python worker behind execute_code and text analysis"""
+
+import os
+import subprocess
+import threading
+
+import pytest
+
+ai_assistant = pytest.importorskip("ai_assistant")
+
+from ai_assistant import AIAssistant
+
+
+@pytest.fixture
+def assistant():
+    """Assistant with only the worker state (no knowledge base, no HTTP session)"""
+    assistant = AIAssistant.__new__(AIAssistant)
+    assistant._py_worker = None
+    assistant._py_conn = None
+    assistant._py_runs = 0
+    assistant._py_lock = threading.Lock()
+    yield assistant
+    assistant._stop_python_worker()
+
+
+def test_worker_is_reused_with_a_fresh_namespace(assistant):
+    first = assistant._run_python("import os\nx = 41\nprint(x + 1, os.getpid())")
+    worker = assistant._py_worker
+    second = assistant._run_python("import os\nprint('x' in globals(), os.getpid())")
+    
+    assert first["returncode"] == 0 and first["stdout"].split()[0] == "42"
+    assert second["returncode"] == 0 and second["stdout"].split()[0] == "False"
+    assert first["stdout"].split()[1] == second["stdout"].split()[1]
+    assert assistant._py_worker is worker
+
+
+def test_errors_and_exit_codes_are_reported(assistant):
+    failed = assistant._run_python("print('vorher')\n1 / 0")
+    assert failed["returncode"] == 1
+    assert failed["stdout"] == "vorher\n"
+    assert "ZeroDivisionError" in failed["stderr"]
+    
+    assert assistant._run_python("raise SystemExit(3)")["returncode"] == 3
+    assert assistant._run_python("import sys\nsys.exit()")["returncode"] == 0
+    # The worker survives both
+    assert assistant._run_python("print('ok')")["stdout"] == "ok\n"
+
+
+def test_hanging_code_times_out_and_the_worker_restarts(assistant):
+    assistant._run_python("pass")
+    hung_worker = assistant._py_worker
+    
+    with pytest.raises(subprocess.TimeoutExpired):
+        assistant._run_python("while True:\n    pass", timeout=0.5)
+    assert assistant._py_worker is None
+    assert not hung_worker.is_alive()
+    
+    assert assistant._run_python("print('wieder da')")["stdout"] == "wieder da\n"
+
+
+def test_execute_code_formats_the_result(assistant):
+    assert assistant.execute_code("print('hallo')") == "✅ Code erfolgreich ausgeführt:\nhallo\n"
+    assert assistant.execute_code("raise ValueError('kaputt')").startswith("❌ Code-Fehler:\n")
+
+
+def test_process_level_output_is_captured(assistant):
+    result = assistant._run_python(
+        "import os, subprocess, sys\n"
+        "print('python')\n"
+        "os.system('echo shell')\n"
+        "subprocess.run([sys.executable, '-c', 'import sys; print(1, file=sys.stderr)'])\n"
+    )
+    assert result["stdout"] == "python\nshell\n"
+    assert result["stderr"] == "1\n"
+
+
+def test_cwd_and_environment_are_reset_between_snippets(assistant, tmp_path):
+    before = assistant._run_python("import os\nprint(os.getcwd())")["stdout"]
+    assistant._run_python(f"import os\nos.chdir({str(tmp_path)!r})\nos.environ['THOR_TEST'] = '1'")
+    after = assistant._run_python("import os\nprint(os.getcwd())\nprint(os.environ.get('THOR_TEST'))")
+    assert after["stdout"] == before + "None\n"
+
+
+def test_worker_is_recycled_after_max_runs(assistant, monkeypatch):
+    monkeypatch.setattr(ai_assistant, "PY_WORKER_MAX_RUNS", 2)
+    pids = [assistant._run_python("import os\nprint(os.getpid())")["stdout"] for _ in range(3)]
+    assert pids[0] == pids[1] != pids[2]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Das ist eine gute Idee", "Positives"),
+    ("Tolles Wetter heute!", "Positives"),
+    ("Das war schlechter als gedacht", "Negatives"),
+    ("Eine schreckliche Sache", "Negatives"),
+    # Each listed word counts once, however often it appears
+    ("gut, gut und nochmal gut, aber schlecht", "Neutrales"),
+    ("Nichts Besonderes", "Neutrales"),
+])
+def test_sentiment_matches_inflected_forms(assistant, text, expected):
+    assert expected in assistant.analyze_text(text, "sentiment")
@@ -0,0 +1,49 @@
+"""Tests for the recorder's silence detection"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pyaudio")
+
+from audio_recorder import _is_silent
+
+
+THRESHOLD = 500
+
+
+def _check(samples):
+    return _is_silent(np.asarray(samples, dtype=np.int16), THRESHOLD, float(THRESHOLD) ** 2)
+
+
+def test_quiet_chunk_is_silent():
+    assert _check([10, -20, 30, -40] * 256)
+
+
+def test_noise_with_loud_peaks_is_silent_by_rms():
+    # Fan noise: RMS around 150 with single peaks above the threshold
+    samples = [150, -150] * 512
+    samples[100] = 900
+    samples[700] = -800
+    assert _check(samples)
+
+
+def test_speech_is_not_silent():
+    assert not _check([2000, -2000] * 512)
+
+
+def test_rms_exactly_at_threshold_is_not_silent():
+    assert not _check([THRESHOLD, -THRESHOLD] * 512)
+
+
+def test_warm_up_compiles_the_callback_signatures():
+    import audio_recorder
+    if not audio_recorder.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+    audio_recorder._warm_up_silence_check()
+    kernels = (audio_recorder._any_loud, audio_recorder._ssq_i16)
+    compiled = [len(kernel.signatures) for kernel in kernels]
+    
+    # Same buffer type as in the PortAudio callback: read-only int16 from np.frombuffer
+    loud = np.frombuffer(np.full(1024, 600, dtype=np.int16).tobytes(), dtype=np.int16)
+    _is_silent(loud, THRESHOLD, float(THRESHOLD) ** 2)
+    assert [len(kernel.signatures) for kernel in kernels] == compiled
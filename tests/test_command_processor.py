@@ -0,0 +1,214 @@
+"""Tests for the STT micro-batcher and the provider race in the command processor"""
+
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+command_processor = pytest.importorskip("command_processor")
+
+from command_processor import EnhancedCommandProcessor, WHISPER_SAMPLE_RATE, WHISPER_WINDOW_SAMPLES
+
+
+class FakeBatchedPipeline:
+    """Stands in for BatchedInferencePipeline: one segment per clip, timed like faster-whisper"""
+    
+    def __init__(self, texts, clips_in_seconds):
+        self.texts = texts
+        self.clips_in_seconds = clips_in_seconds
+        self.calls = []
+    
+    def transcribe(self, audio, clip_timestamps, batch_size, **kwargs):
+        self.calls.append({"audio": audio, "clips": clip_timestamps, "batch_size": batch_size})
+        scale = 1 if self.clips_in_seconds else WHISPER_SAMPLE_RATE
+        segments = []
+        for clip, text in zip(clip_timestamps, self.texts):
+            start = clip["start"] / scale
+            # Two segments per utterance, the second one later inside the same slot
+            segments.append(SimpleNamespace(text=f" {text}", start=start))
+            segments.append(SimpleNamespace(text=" ende", start=start + 1.5))
+        return iter(segments), None
+
+
+@pytest.mark.parametrize("clips_in_seconds", [False, True])
+def test_batch_clips_use_the_units_of_the_installed_version(monkeypatch, clips_in_seconds):
+    monkeypatch.setattr(command_processor, "FASTER_WHISPER_CLIPS_IN_SECONDS", clips_in_seconds)
+    pipeline = FakeBatchedPipeline(["eins", "zwei", "drei"], clips_in_seconds)
+    processor = SimpleNamespace(_batched_whisper=pipeline)
+    audios = [np.full(n, 0.1, dtype=np.float32) for n in (16000, 8000, 32000)]
+    
+    texts = EnhancedCommandProcessor._transcribe_batch_faster(processor, audios)
+    
+    assert texts == ["eins ende", "zwei ende", "drei ende"]
+    call = pipeline.calls[0]
+    assert call["batch_size"] == 3
+    if clips_in_seconds:
+        assert call["clips"] == [{"start": 0.0, "end": 30.0}, {"start": 30.0, "end": 60.0},
+                                 {"start": 60.0, "end": 90.0}]
+    else:
+        assert call["clips"] == [{"start": 0, "end": WHISPER_WINDOW_SAMPLES},
+                                 {"start": WHISPER_WINDOW_SAMPLES, "end": 2 * WHISPER_WINDOW_SAMPLES},
+                                 {"start": 2 * WHISPER_WINDOW_SAMPLES, "end": 3 * WHISPER_WINDOW_SAMPLES}]
+        assert all(isinstance(value, int) for clip in call["clips"] for value in clip.values())
+    
+    # Each utterance sits at the start of its own 30 s slot, followed by silence
+    audio = call["audio"]
+    assert audio.size == 3 * WHISPER_WINDOW_SAMPLES
+    assert np.count_nonzero(audio[WHISPER_WINDOW_SAMPLES:2 * WHISPER_WINDOW_SAMPLES]) == 8000
+
+
+def _bare_processor():
+    """Processor with just the state the STT batcher and the race need"""
+    processor = EnhancedCommandProcessor.__new__(EnhancedCommandProcessor)
+    processor.whisper_model = object()
+    processor._stt_queue = None
+    processor._stt_worker_task = None
+    processor._llm_semaphore = asyncio.Semaphore(4)
+    return processor
+
+
+def _pcm(n_samples: int) -> bytes:
+    return np.zeros(n_samples, dtype=np.int16).tobytes()
+
+
+def test_concurrent_transcriptions_are_decoded_as_one_batch():
+    processor = _bare_processor()
+    batches = []
+    
+    def transcribe_batch(audios):
+        batches.append([audio.size for audio in audios])
+        return [f"text{audio.size}" for audio in audios]
+    
+    processor._transcribe_batch = transcribe_batch
+    
+    async def run():
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*(processor._transcribe(_pcm(n)) for n in (100, 200, 300))), timeout=5
+            )
+        finally:
+            processor._stt_worker_task.cancel()
+    
+    assert asyncio.run(run()) == ["text100", "text200", "text300"]
+    assert batches == [[100, 200, 300]]
+
+
+def test_failed_batch_resolves_every_request_with_empty_text():
+    processor = _bare_processor()
+    
+    def transcribe_batch(audios):
+        raise RuntimeError("decoder crashed")
+    
+    processor._transcribe_batch = transcribe_batch
+    
+    async def run():
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(processor._transcribe(_pcm(100)), processor._transcribe(_pcm(200))), timeout=5
+            )
+        finally:
+            processor._stt_worker_task.cancel()
+    
+    assert asyncio.run(run()) == ["", ""]
+
+
+async def _provider(result, delay, log, name):
+    """Fake provider coroutine that records whether it finished or was cancelled"""
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        log.append(f"{name} cancelled")
+        raise
+    if isinstance(result, Exception):
+        raise result
+    log.append(f"{name} done")
+    return result
+
+
+def test_race_returns_first_valid_command_and_cancels_the_rest():
+    processor = _bare_processor()
+    log = []
+    
+    async def run():
+        command = await asyncio.wait_for(processor._race_providers(
+            _provider({"action": "move", "source": "a.txt"}, 0.01, log, "fast"),
+            _provider({"action": "copy", "source": ["b.txt"]}, 10, log, "slow")
+        ), timeout=5)
+        await asyncio.sleep(0)
+        return command
+    
+    assert asyncio.run(run()) == {"action": "move", "source": ["a.txt"]}
+    assert log == ["fast done", "slow cancelled"]
+
+
+def test_race_skips_failed_and_invalid_providers():
+    processor = _bare_processor()
+    log = []
+    
+    async def run():
+        return await asyncio.wait_for(processor._race_providers(
+            _provider(RuntimeError("timeout"), 0.01, log, "broken"),
+            _provider({"action": "format_disk"}, 0.02, log, "invalid"),
+            _provider({"action": "delete", "source": ["c.txt"]}, 0.05, log, "valid")
+        ), timeout=5)
+    
+    assert asyncio.run(run()) == {"action": "delete", "source": ["c.txt"]}
+
+
+def test_race_returns_none_when_no_provider_answers_validly():
+    processor = _bare_processor()
+    log = []
+    
+    async def run():
+        return await asyncio.wait_for(processor._race_providers(
+            _provider(None, 0.01, log, "empty"),
+            _provider(RuntimeError("timeout"), 0.02, log, "broken")
+        ), timeout=5)
+    
+    assert asyncio.run(run()) is None
+
+
+def test_only_action_commands_are_cached():
+    processor = _bare_processor()
+    processor._cmd_cache = OrderedDict()
+    processor._cmd_cache_size = 8
+    
+    processor._cache_command(("personal", "wie geht es dir"), {"type": "text_response", "content": "Gut!"})
+    processor._cache_command(("simple", "verschiebe a.txt"), {"action": "move", "source": ["a.txt"]})
+    
+    assert processor._get_cached_command(("personal", "wie geht es dir")) is None
+    assert processor._get_cached_command(("simple", "verschiebe a.txt")) == {"action": "move", "source": ["a.txt"]}
+
+
+class FakeChatServer:
+    """Async stand-in for the local OpenAI-compatible server"""
+    
+    def __init__(self, content):
+        self.content = content
+        self.payloads = []
+    
+    async def post(self, path, json):
+        self.payloads.append(json)
+        body = {"choices": [{"message": {"content": self.content}}]}
+        return SimpleNamespace(status_code=200, json=lambda: body)
+
+
+def test_simple_phi4_request_leaves_room_for_reasoning_before_the_json(monkeypatch):
+    monkeypatch.setattr(command_processor, "HTTPX_AVAILABLE", True)
+    processor = _bare_processor()
+    processor.local_config = {"endpoint": "http://localhost:1234/v1", "model": "phi-4-mini-reasoning"}
+    processor._get_persona_context = lambda routing_type: ("thor", "")
+    processor._http = FakeChatServer(
+        "<thinking>\nDer Nutzer will eine Datei verschieben.\n\nZiel: Archiv.\n</thinking>\n\n"
+        '{"action": "move", "source": ["a.txt"], "destination": "Archiv", "parameters": {}}'
+    )
+    
+    command = asyncio.run(processor._process_with_phi4_reasoning("verschiebe a.txt ins Archiv", "simple"))
+    
+    assert command["action"] == "move"
+    payload = processor._http.payloads[0]
+    assert "stop" not in payload
+    assert payload["max_tokens"] >= 512
+    assert payload["response_format"]["json_schema"]["schema"] is command_processor.COMMAND_SCHEMA
@@ -0,0 +1,32 @@
+"""Tests for keyword matching in the communication analyzer"""
+
+import pytest
+
+import communication_analyzer
+from communication_analyzer import CommunicationAnalyzer, CommunicationType
+
+
+@pytest.fixture(params=[True, False], ids=["automaton", "tokens"])
+def analyzer(request, monkeypatch):
+    if request.param and not communication_analyzer.AHOCORASICK_AVAILABLE:
+        pytest.skip("pyahocorasick not installed")
+    monkeypatch.setattr(communication_analyzer, "AHOCORASICK_AVAILABLE", request.param)
+    return CommunicationAnalyzer()
+
+
+@pytest.mark.parametrize("text, expected_type, expected_confidence", [
+    ("Ich brauche dich wirklich", CommunicationType.CONNECTION_SEEKING, 0.364),
+    ("Unsere Gespräche sind toll", CommunicationType.META_REFLECTION, 0.393),
+])
+def test_keyword_stems_match_inflected_words(analyzer, text, expected_type, expected_confidence):
+    pattern = analyzer.analyze_communication(text)
+    
+    assert pattern.pattern_type is expected_type
+    assert pattern.confidence == pytest.approx(expected_confidence, abs=1e-3)
+
+
+def test_keywords_only_match_at_word_starts(analyzer):
+    index = list(analyzer.patterns).index(CommunicationType.CONNECTION_SEEKING)
+    
+    assert analyzer._count_keywords("ich brauche dich")[index] > 0
+    assert analyzer._count_keywords("gebrauchtwagen")[index] == 0